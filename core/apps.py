@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from .db import configure_sqlite
+        from .images import delete_detail_variants
+        from .search import delete_document
+
+        connection_created.connect(configure_sqlite, dispatch_uid='core.configure_sqlite')
+        post_delete.connect(delete_detail_variants, sender='core.PersonalDetail',
+                            dispatch_uid='core.delete_detail_variants')
+        post_delete.connect(delete_document, sender='core.Resume', dispatch_uid='core.delete_search_document')
+        if settings.WARM_TEMPLATES_ON_STARTUP:
+            from .warmup import warm_templates
+
+            warm_templates()
@@ -0,0 +1,405 @@
+import asyncio
+import itertools
+import math
+import resource
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from datetime import date
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import Storage
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from . import themes
+from .forms import (
+    ResumeForm, PersonalDetailForm,
+    EducationFormSet, ExperienceFormSet, SkillFormSet,
+    ResearchFormSet, PublicationFormSet, AwardFormSet
+)
+from .models import Resume, PersonalDetail, Education, Experience, Skill, Research, Publication, Award
+
+# One benchmarked request: what to send and as which user
+Request = namedtuple('Request', ['user', 'method', 'path', 'data'])
+
+
+def seed(users, resumes_per_user, publications):
+    # Every other document is a CV carrying the long publication list
+    owners = []
+    for u in range(users):
+        user = User.objects.create_user(f'bench-{u}')
+        resumes = []
+        for r in range(resumes_per_user):
+            cv = r % 2 == 1
+            resume = Resume.objects.create(
+                user=user, title=f'Benchmark {u}-{r}', doc_type='cv' if cv else 'resume',
+                template_name=Resume.TEMPLATE_CHOICES[r % len(Resume.TEMPLATE_CHOICES)][0])
+            PersonalDetail.objects.create(
+                resume=resume, full_name=f'Bench User {u}', email=f'bench{u}@example.com', phone='+1 555 0100',
+                address='Lisbon, Portugal', linkedin_url='https://linkedin.com/in/bench',
+                summary='Engineer with a decade of experience shipping web products. ' * 4)
+            Education.objects.bulk_create([
+                Education(resume=resume, institution=f'University {i}', degree='MSc Computer Science',
+                          start_date=date(2008 + i, 9, 1), end_date=date(2010 + i, 6, 30),
+                          description='Thesis on distributed systems.')
+                for i in range(3)])
+            Experience.objects.bulk_create([
+                Experience(resume=resume, company=f'Company {i}', position='Senior Engineer',
+                           start_date=date(2012 + i, 1, 1), end_date=date(2013 + i, 1, 1),
+                           description='Led a team of five. Cut page load times in half. ' * 3)
+                for i in range(6)])
+            Skill.objects.bulk_create([
+                Skill(resume=resume, name=f'Skill {i}', proficiency=50 + i * 4) for i in range(12)])
+            if cv:
+                Research.objects.bulk_create([
+                    Research(resume=resume, title=f'Research project {i}', date=date(2015, 1, 1),
+                             description='Funded project on query optimisation.')
+                    for i in range(5)])
+                Publication.objects.bulk_create([
+                    Publication(resume=resume, title=f'Paper {i}: on caching', publisher='ACM',
+                                date=date(2010 + i % 12, 1, 1), url=f'https://doi.org/10.1145/{i}')
+                    for i in range(publications)])
+                Award.objects.bulk_create([
+                    Award(resume=resume, title=f'Award {i}', issuer='IEEE', date=date(2016 + i, 1, 1))
+                    for i in range(5)])
+            resumes.append(resume)
+        owners.append((user, resumes))
+    return owners
+
+
+def edit_post_data(resume):
+    # What the edit page posts back when nothing is touched
+    resume = Resume.objects.with_content().get(pk=resume.pk)
+    forms = [ResumeForm(instance=resume), PersonalDetailForm(instance=resume.personal_detail)]
+    for formset_class in (EducationFormSet, ExperienceFormSet, SkillFormSet,
+                          ResearchFormSet, PublicationFormSet, AwardFormSet):
+        formset = formset_class(instance=resume)
+        forms += [formset.management_form, *formset.forms]
+    data = {}
+    for form in forms:
+        for field in form:
+            value = field.value()
+            if value in (None, False) or field.name == 'image':
+                continue
+            data[field.html_name] = 'on' if value is True else value
+    return data
+
+
+def available_templates():
+    names = []
+    for code, _ in Resume.TEMPLATE_CHOICES:
+        try:
+            get_template(themes.template_name(code))
+        except TemplateDoesNotExist:
+            continue
+        names.append(code)
+    return names
+
+
+def scenarios(owners, templates, export_formats):
+    # name -> requests, each scenario cycles through them
+    documents = [(user, resume) for user, resumes in owners for resume in resumes]
+    plan = {'dashboard': [Request(user, 'GET', reverse('dashboard'), None) for user, _ in owners]}
+    for template_name in templates:
+        plan[f'view_resume:{template_name}'] = [
+            Request(user, 'GET', f'{reverse("view_resume", args=[resume.pk])}?template={template_name}', None)
+            for user, resume in documents]
+    plan['edit_resume'] = []
+    for user, resume in documents:
+        data = edit_post_data(resume)
+        data['title'] = f'{resume.title} (edited)'
+        plan['edit_resume'].append(Request(user, 'POST', reverse('edit_resume', args=[resume.pk]), data))
+    for export_format in export_formats:
+        plan[f'export_resume:{export_format}'] = [
+            Request(user, 'GET', f'{reverse("export_resume", args=[resume.pk])}?format={export_format}', None)
+            for user, resume in documents]
+    return plan
+
+
+def peak_rss_kb():
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def percentile(values, fraction):
+    # Nearest rank
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(latencies, queries, errors):
+    # queries is None when they were not counted
+    if not latencies:
+        return {'requests': 0, 'errors': errors, 'peak_rss_kb': peak_rss_kb()}
+    ms = [seconds * 1000 for seconds in latencies]
+    summary = {
+        'requests': len(ms),
+        'errors': errors,
+        'mean_ms': round(sum(ms) / len(ms), 3),
+        'p50_ms': round(percentile(ms, 0.50), 3),
+        'p95_ms': round(percentile(ms, 0.95), 3),
+        'p99_ms': round(percentile(ms, 0.99), 3),
+    }
+    if queries is not None:
+        summary['queries_mean'] = round(sum(queries) / len(queries), 2)
+        summary['queries_max'] = max(queries)
+    summary['peak_rss_kb'] = peak_rss_kb()
+    return summary
+
+
+class TestClientDriver:
+    # Requests go through Django's test client in this process
+    def __init__(self):
+        self.clients = {}
+
+    def client(self, user):
+        if user.pk not in self.clients:
+            # A failing view is counted as an error, not raised
+            self.clients[user.pk] = Client(raise_request_exception=False)
+            self.clients[user.pk].force_login(user)
+        return self.clients[user.pk]
+
+    def send(self, request):
+        client = self.client(request.user)
+        with CaptureQueriesContext(connection) as queries:
+            if request.method == 'POST':
+                response = client.post(request.path, request.data)
+            else:
+                response = client.get(request.path)
+            # Streamed bodies are only produced while they are read
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response.status_code, len(queries)
+
+    def close(self):
+        pass
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # The redirect itself is the response, as with the test client
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class WSGIServerDriver:
+    # Requests go over HTTP to a wsgiref server running the project in a
+    # thread of this process, the database and caches are shared
+    def __init__(self):
+        handler = WSGIHandler()
+        self.queries = 0
+
+        def application(environ, start_response):
+            with CaptureQueriesContext(connection) as queries:
+                body = b''.join(handler(environ, start_response))
+            self.queries = len(queries)
+            return [body]
+
+        self.server = make_server('127.0.0.1', 0, application, handler_class=_QuietHandler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.opener = urllib.request.build_opener(_NoRedirect)
+        self.cookies = {}
+
+    def cookie(self, user):
+        if user.pk not in self.cookies:
+            # Session of a test client login, plus a fixed CSRF secret for the POSTs
+            session = Client()
+            session.force_login(user)
+            token = get_random_string(32)
+            self.cookies[user.pk] = (token, f'{settings.SESSION_COOKIE_NAME}='
+                                            f'{session.cookies[settings.SESSION_COOKIE_NAME].value}; '
+                                            f'{settings.CSRF_COOKIE_NAME}={token}')
+        return self.cookies[user.pk]
+
+    def send(self, request):
+        token, cookie = self.cookie(request.user)
+        data = urlencode(request.data, doseq=True).encode() if request.method == 'POST' else None
+        http_request = urllib.request.Request(
+            self.base_url + request.path, data=data, method=request.method,
+            headers={'Cookie': cookie, 'X-CSRFToken': token})
+        try:
+            with self.opener.open(http_request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            exc.read()
+            status = exc.code
+        return status, self.queries
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run(driver, plan, iterations, warmup=1):
+    results = {}
+    for name, requests in plan.items():
+        latencies, queries, errors = [], [], 0
+        for n in range(warmup + iterations):
+            request = requests[n % len(requests)]
+            started = time.perf_counter()
+            status, query_count = driver.send(request)
+            elapsed = time.perf_counter() - started
+            if n < warmup:
+                continue
+            if status >= 400:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+            queries.append(query_count)
+        results[name] = summarize(latencies, queries, errors)
+    return results
+
+
+def mixed_requests(owners, export_format):
+    # (kind, request): a preview and an export of every document whose
+    # template exists, interleaved
+    templates = set(available_templates())
+    requests = []
+    for user, resumes in owners:
+        for resume in resumes:
+            if resume.template_name not in templates:
+                continue
+            requests.append(('preview', Request(user, 'GET', reverse('view_resume', args=[resume.pk]), None)))
+            requests.append(('export', Request(
+                user, 'GET', f'{reverse("export_resume", args=[resume.pk])}?format={export_format}', None)))
+    return requests
+
+
+class UncachedPDFStorage(Storage):
+    # pdf_cache storage for the mixed runs: nothing is kept, every PDF export
+    # renders as it does right after an edit
+    def exists(self, name):
+        return False
+
+    def _save(self, name, content):
+        return name
+
+
+def _session_cookies(requests):
+    cookies = {}
+    for _, request in requests:
+        if request.user.pk not in cookies:
+            client = Client()
+            client.force_login(request.user)
+            cookies[request.user.pk] = client.cookies
+    return cookies
+
+
+def _mixed_wsgi(requests, cookies, concurrency, total):
+    # A thread per client, as a threaded WSGI server runs requests
+    counter = itertools.count()
+    outcomes = []
+
+    def client_thread():
+        clients = {}
+        try:
+            while (n := next(counter)) < total:
+                kind, request = requests[n % len(requests)]
+                client = clients.get(request.user.pk)
+                if client is None:
+                    client = clients[request.user.pk] = Client(raise_request_exception=False)
+                    client.cookies = cookies[request.user.pk]
+                started = time.perf_counter()
+                response = client.get(request.path)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                outcomes.append((n, kind, response.status_code, time.perf_counter() - started))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=client_thread) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes, time.perf_counter() - started
+
+
+async def _mixed_asgi(requests, cookies, concurrency, total):
+    # A task per client on one event loop, as an ASGI server runs requests
+    counter = itertools.count()
+    outcomes = []
+    clients = {}
+    for user_id, jar in cookies.items():
+        clients[user_id] = AsyncClient(raise_request_exception=False)
+        clients[user_id].cookies = jar
+
+    async def client_task():
+        while (n := next(counter)) < total:
+            kind, request = requests[n % len(requests)]
+            started = time.perf_counter()
+            response = await clients[request.user.pk].get(request.path)
+            if response.streaming and response.is_async:
+                [chunk async for chunk in response.streaming_content]
+            elif response.streaming:
+                b''.join(response.streaming_content)
+            outcomes.append((n, kind, response.status_code, time.perf_counter() - started))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_task() for _ in range(concurrency)))
+    return outcomes, time.perf_counter() - started
+
+
+def run_mixed(handler, requests, concurrency, iterations, warmup=1):
+    # Preview and export traffic from `concurrency` clients at once, through
+    # Django's WSGI or ASGI request handler in this process. Results per kind
+    # of request, plus the throughput of the whole run.
+    cookies = _session_cookies(requests)
+    total = (warmup + iterations) * len(requests)
+    if handler == 'asgi':
+        outcomes, elapsed = asyncio.run(_mixed_asgi(requests, cookies, concurrency, total))
+    else:
+        outcomes, elapsed = _mixed_wsgi(requests, cookies, concurrency, total)
+    measured = [outcome for outcome in outcomes if outcome[0] >= warmup * len(requests)]
+    results = {}
+    for kind in dict.fromkeys(kind for kind, _ in requests):
+        latencies = [seconds for _, name, status, seconds in measured if name == kind and status < 400]
+        errors = sum(1 for _, name, status, _ in measured if name == kind and status >= 400)
+        results[f'{handler}:{kind}'] = summarize(latencies, None, errors)
+    results[f'{handler}:total'] = {
+        'requests': len(measured),
+        'errors': sum(1 for _, _, status, _ in measured if status >= 400),
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(outcomes) / elapsed, 2),
+    }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # (name, metric, before, after, change %, regressed) for what both runs measured
+    rows = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or not current.get('requests') or not before.get('requests'):
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_mean'):
+            if metric not in before or metric not in current:
+                continue
+            old, new = before[metric], current[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            regressed = tolerance is not None and (
+                new > old if metric == 'queries_mean' else change > tolerance)
+            rows.append((name, metric, old, new, change, regressed))
+    return rows
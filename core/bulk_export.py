@@ -0,0 +1,176 @@
+import logging
+import threading
+import zipfile
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from . import exporters
+from .models import Resume
+from .workers import process_pool
+
+logger = logging.getLogger(__name__)
+
+# content is bytes, or an iterator of byte chunks for streamed formats
+ExportResult = namedtuple('ExportResult', ['resume_id', 'export_format', 'arcname', 'content', 'error'])
+
+# Worker processes of the bulk export view, kept for the life of the web
+# process and shared by its requests, see shared_pool()
+_shared_pool = None
+_lock = threading.Lock()
+
+
+def select_resumes(ids=None, usernames=None):
+    resumes = Resume.objects.all()
+    if ids:
+        resumes = resumes.filter(pk__in=ids)
+    if usernames:
+        resumes = resumes.filter(user__username__in=usernames)
+    return resumes.order_by('pk').values_list('pk', flat=True)
+
+
+def render_one(resume_id, export_format):
+    # Runs in a worker process
+    resume = Resume.objects.with_content().get(pk=resume_id)
+    filename = exporters.export_filename(resume, export_format)
+    arcname = f'{resume.user.username}/{resume.pk}-{filename}'
+    return arcname, exporters.export_document(resume, export_format)
+
+
+def _text_result(resume_id):
+    # Text is cheap to produce, it is generated in this process and streamed
+    # straight into the archive instead of going through the pool
+    try:
+        resume = Resume.objects.with_content().get(pk=resume_id)
+        filename = exporters.export_filename(resume, 'txt')
+    except Exception as exc:
+        return ExportResult(resume_id, 'txt', None, None, exc)
+    arcname = f'{resume.user.username}/{resume.pk}-{filename}'
+    return ExportResult(resume_id, 'txt', arcname, exporters.iter_resume_text(resume), None)
+
+
+def shared_pool():
+    # Started by the first bulk export of a web process. Requests do not each
+    # spawn BULK_EXPORT_WORKERS processes running django.setup(), and
+    # concurrent exports queue for the same workers.
+    global _shared_pool
+    with _lock:
+        if _shared_pool is None:
+            _shared_pool = process_pool(settings.BULK_EXPORT_WORKERS, close_connections=False)
+        return _shared_pool
+
+
+def _new_pool(workers, shared):
+    return shared_pool() if shared else process_pool(workers)
+
+
+def _discard(pool, shared):
+    global _shared_pool
+    pool.shutdown(wait=False, cancel_futures=True)
+    if shared:
+        with _lock:
+            if _shared_pool is pool:
+                _shared_pool = None
+
+
+def iter_exports(resume_ids, formats, workers, shared=False):
+    # Renders across a process pool, keeping only a small window of documents
+    # in flight so memory stays bounded however many are requested. With
+    # shared, the view's long-lived pool is used and left running.
+    tasks = ((resume_id, export_format) for resume_id in resume_ids for export_format in formats)
+    window = workers * 2
+    pool = None
+    pending = {}
+    try:
+        while True:
+            while len(pending) < window:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                if task[1] == 'txt':
+                    yield _text_result(task[0])
+                    continue
+                if pool is None:
+                    pool = _new_pool(workers, shared)
+                try:
+                    future = pool.submit(render_one, *task)
+                except BrokenProcessPool:
+                    # A worker died, its futures fail and the pool is replaced
+                    _discard(pool, shared)
+                    pool = _new_pool(workers, shared)
+                    future = pool.submit(render_one, *task)
+                pending[future] = task
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                resume_id, export_format = pending.pop(future)
+                try:
+                    arcname, content = future.result()
+                except Exception as exc:
+                    yield ExportResult(resume_id, export_format, None, None, exc)
+                else:
+                    yield ExportResult(resume_id, export_format, arcname, content, None)
+    finally:
+        if pool is not None and not shared:
+            pool.shutdown(wait=True, cancel_futures=True)
+        # An abandoned download leaves nothing queued on the shared pool
+        for future in pending:
+            future.cancel()
+
+
+class _ZipStream:
+    # Write-only file object that hands back what zipfile wrote since the
+    # last drain(). Having no seek() makes zipfile use data descriptors.
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return b''.join(chunks)
+
+
+def stream_zip(results, total, progress=None):
+    stream = _ZipStream()
+    failures = []
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for done, result in enumerate(results, start=1):
+            if result.error is None and isinstance(result.content, bytes):
+                archive.writestr(result.arcname, result.content)
+            elif result.error is None:
+                # Chunked content (text exports) is copied through as it is generated
+                with archive.open(result.arcname, 'w') as entry:
+                    for chunk in result.content:
+                        entry.write(chunk)
+                        yield stream.drain()
+            else:
+                # One bad document is reported, not fatal for the batch
+                failures.append(f'resume {result.resume_id} ({result.export_format}): {result.error}')
+            if progress is not None:
+                progress(done, total, result)
+            yield stream.drain()
+        if failures:
+            archive.writestr('errors.txt', '\n'.join(failures) + '\n')
+    yield stream.drain()
+
+
+def log_progress(done, total, result):
+    if result.error is None:
+        logger.info('Bulk export %d/%d: %s', done, total, result.arcname)
+    else:
+        logger.warning('Bulk export %d/%d: resume %s (%s) failed: %s',
+                       done, total, result.resume_id, result.export_format, result.error)
@@ -0,0 +1,87 @@
+import hashlib
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from . import themes
+from .models import Resume
+
+# Sample resume shown by the template gallery. Built once at import and
+# read-only, so one instance is shared by every render.
+
+
+class Section(tuple):
+    # Stands in for a related manager, templates call .all()
+    def all(self):
+        return self
+
+
+DemoPersonalDetail = namedtuple('DemoPersonalDetail', [
+    'full_name', 'email', 'phone', 'address', 'linkedin_url', 'portfolio_url', 'summary'])
+DemoExperience = namedtuple('DemoExperience', [
+    'position', 'company', 'start_date', 'end_date', 'is_current', 'description'])
+DemoEducation = namedtuple('DemoEducation', [
+    'degree', 'institution', 'start_date', 'end_date', 'is_current', 'description'])
+DemoSkill = namedtuple('DemoSkill', ['name', 'proficiency'])
+DemoResearch = namedtuple('DemoResearch', ['title', 'date', 'description'])
+DemoPublication = namedtuple('DemoPublication', ['title', 'publisher', 'date', 'url'])
+DemoAward = namedtuple('DemoAward', ['title', 'issuer', 'date'])
+DemoResume = namedtuple('DemoResume', [
+    'personal_detail', 'experience', 'education', 'skills', 'research', 'publications', 'awards',
+    'doc_type', 'get_doc_type_display'])
+
+RESUME = DemoResume(
+    personal_detail=DemoPersonalDetail(
+        full_name='Alex Rivera',
+        email='alex.rivera@example.com',
+        phone='+1 (555) 123-4567',
+        address='San Francisco, CA',
+        linkedin_url='linkedin.com/in/alexrivera',
+        portfolio_url='alexrivera.design',
+        summary='Innovative Creative Director with 8+ years of experience in digital branding and UI/UX design. Proven track record of leading high-performance teams to deliver award-winning campaigns. Passionate about user-centric design and storytelling.',
+    ),
+    experience=Section([
+        DemoExperience(position='Senior Product Designer', company='TechFlow Inc.', start_date='2020-03', end_date='Present', is_current=True, description='Lead design systems and manage a team of 5 designers. Increased user engagement by 40% through UI overhaul.'),
+        DemoExperience(position='UX Designer', company='CreativAgency', start_date='2017-06', end_date='2020-02', is_current=False, description='Designed web and mobile interfaces for Fortune 500 clients. Conducted user research and usability testing.'),
+    ]),
+    education=Section([
+        DemoEducation(degree='Master of Interaction Design', institution='Design Academy', start_date='2015', end_date='2017', is_current=False, description='Focus on Human-Computer Interaction.'),
+        DemoEducation(degree='Bachelor of Fine Arts', institution='University of Arts', start_date='2011', end_date='2015', is_current=False, description='Major in Graphic Design.'),
+    ]),
+    skills=Section([
+        DemoSkill(name='UI/UX Design', proficiency=95),
+        DemoSkill(name='Figma & Sketch', proficiency=90),
+        DemoSkill(name='HTML/CSS', proficiency=80),
+        DemoSkill(name='Brand Identity', proficiency=85),
+        DemoSkill(name='Team Leadership', proficiency=90),
+    ]),
+    research=Section([
+        DemoResearch(title='User Empathy in Digital Products', date='2019', description='Published research on how emotional design affects user retention.'),
+    ]),
+    publications=Section([
+        DemoPublication(title='The Future of Minimalist UI', publisher='Design Weekly', date='2021', url='designweekly.com/minimalist'),
+    ]),
+    awards=Section([
+        DemoAward(title='Best Mobile App Design', issuer='Tech Design Awards', date='2022'),
+    ]),
+    doc_type='cv',
+    get_doc_type_display='CV',
+)
+
+TEMPLATE_NAMES = frozenset(code for code, _ in Resume.TEMPLATE_CHOICES)
+
+
+@lru_cache(maxsize=64)
+def _render(template_name):
+    html = render_to_string(themes.template_name(template_name), themes.context(template_name, {'resume': RESUME}))
+    return html, hashlib.sha256(html.encode()).hexdigest()
+
+
+def render(template_name):
+    # (html, digest) of the template filled with the sample resume. Memoized
+    # per template, except in DEBUG where template edits should show up.
+    if settings.DEBUG:
+        return _render.__wrapped__(template_name)
+    return _render(template_name)
@@ -0,0 +1,105 @@
+from django.template.loader import render_to_string
+
+from . import pdf_cache, themes
+from .rendering import render_pdf
+
+CONTENT_TYPES = {
+    'txt': 'text/plain',
+    'doc': 'application/msword',
+    'pdf': 'application/pdf',
+}
+
+
+def export_filename(resume, export_format):
+    return f"{resume.personal_detail.full_name.replace(' ', '_')}_{resume.get_doc_type_display()}.{export_format}"
+
+
+def _section(heading, rows, format_row):
+    # Walks the (prefetched) rows once, the heading only appears if there are any
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return
+    yield heading
+    yield from format_row(first)
+    for row in rows:
+        yield from format_row(row)
+
+
+def _education_lines(edu):
+    yield f"- {edu.degree} at {edu.institution} ({edu.start_date} - {'Present' if edu.is_current else edu.end_date})"
+    if edu.description: yield f"  {edu.description}"
+
+
+def _experience_lines(exp):
+    yield f"- {exp.position} at {exp.company} ({exp.start_date} - {'Present' if exp.is_current else exp.end_date})"
+    if exp.description: yield f"  {exp.description}"
+
+
+def resume_lines(resume):
+    pd = resume.personal_detail
+    yield f"NAME: {pd.full_name}"
+    yield f"EMAIL: {pd.email}"
+    yield f"PHONE: {pd.phone}"
+    yield f"ADDRESS: {pd.address}"
+    if pd.linkedin_url: yield f"LINKEDIN: {pd.linkedin_url}"
+    if pd.portfolio_url: yield f"PORTFOLIO: {pd.portfolio_url}"
+    yield f"\nSUMMARY:\n{pd.summary}\n"
+
+    yield from _section("\nEDUCATION:", resume.education.all(), _education_lines)
+    yield from _section("\nEXPERIENCE:", resume.experience.all(), _experience_lines)
+    yield from _section("\nSKILLS:", resume.skills.all(),
+                        lambda skill: [f"- {skill.name} ({skill.proficiency}%)"])
+
+    # CV Sections
+    yield from _section("\nRESEARCH:", resume.research.all(),
+                        lambda res: [f"- {res.title} ({res.date}): {res.description}"])
+    yield from _section("\nPUBLICATIONS:", resume.publications.all(),
+                        lambda pub: [f"- {pub.title} ({pub.publisher}, {pub.date})"])
+    yield from _section("\nAWARDS:", resume.awards.all(),
+                        lambda award: [f"- {award.title} ({award.issuer}, {award.date})"])
+
+
+def iter_resume_text(resume):
+    # Same output as '\n'.join(resume_lines(resume)), one encoded chunk per line
+    lines = resume_lines(resume)
+    first = next(lines, None)
+    if first is None:
+        return
+    yield first.encode()
+    for line in lines:
+        yield f'\n{line}'.encode()
+
+
+async def aiter_resume_text(resume):
+    # For StreamingHttpResponse under ASGI, which would otherwise hand the
+    # plain iterator to a thread
+    for chunk in iter_resume_text(resume):
+        yield chunk
+
+
+def resume_doc(resume):
+    # HTML pretending to be a Word document, rendered from the resume's own template
+    return render_to_string(themes.template_name(resume.template_name),
+                            themes.context(resume.template_name, {'resume': resume}))
+
+
+def resume_pdf(resume):
+    cache_key = pdf_cache.cache_key(resume, resume.template_name)
+    cached = pdf_cache.open_cached(resume, cache_key)
+    if cached is not None:
+        with cached:
+            return cached.read()
+    pdf = render_pdf(resume, resume.template_name)
+    pdf_cache.store(resume, cache_key, pdf)
+    return pdf
+
+
+def export_document(resume, export_format):
+    if export_format == 'txt':
+        return b''.join(iter_resume_text(resume))
+    if export_format == 'doc':
+        return resume_doc(resume).encode()
+    if export_format == 'pdf':
+        return resume_pdf(resume)
+    raise ValueError(f'Unknown export format: {export_format}')
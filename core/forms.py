@@ -1,5 +1,6 @@
 from django import forms
-from django.forms import inlineformset_factory
+from django.core.exceptions import ValidationError
+from django.forms import BaseInlineFormSet, inlineformset_factory
 from .models import Resume, PersonalDetail, Education, Experience, Skill,Research,Publication,Award
 
 class ResumeForm(forms.ModelForm):
@@ -93,10 +94,89 @@ class AwardForm(forms.ModelForm):
             'date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
         }
 
+class ExistingRowField(forms.ModelChoiceField):
+    # The hidden primary key of a formset row, looked up among the rows the
+    # formset already holds instead of with a query per row
+    def __init__(self, formset, *args, **kwargs):
+        self.formset = formset
+        super().__init__(*args, **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            obj = self.formset._existing_object(self.formset.model._meta.pk.to_python(value))
+        except ValidationError:
+            obj = None
+        if obj is None:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+        return obj
+
+class BulkInlineFormSet(BaseInlineFormSet):
+    def get_queryset(self):
+        # Rows prefetched by Resume.objects.with_content() are used as they are
+        if not hasattr(self, '_queryset'):
+            prefetched = getattr(self.instance, '_prefetched_objects_cache', {})
+            rows = prefetched.get(self.fk.remote_field.get_accessor_name())
+            if rows is not None:
+                self._queryset = rows
+        return super().get_queryset()
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        pk_name = self.model._meta.pk.name
+        field = form.fields.get(pk_name)
+        if type(field) is forms.ModelChoiceField:
+            form.fields[pk_name] = ExistingRowField(
+                self, field.queryset, initial=field.initial, required=field.required, widget=field.widget)
+
+    def bulk_save(self):
+        # Same outcome as save(): one DELETE, one UPDATE and one INSERT at
+        # most, rows the user did not touch are left alone
+        self.new_objects, self.changed_objects, self.deleted_objects = [], [], []
+        changed_fields = set()
+        for form in self.initial_forms:
+            obj = form.instance
+            if obj.pk is None:
+                continue
+            if form in self.deleted_forms:
+                self.deleted_objects.append(obj)
+            elif form.has_changed():
+                self.changed_objects.append((form.save(commit=False), form.changed_data))
+                changed_fields.update(name for name in form.changed_data if name in form._meta.fields)
+        for form in self.extra_forms:
+            if not form.has_changed() or (self.can_delete and self._should_delete_form(form)):
+                continue
+            obj = form.save(commit=False)
+            setattr(obj, self.fk.name, self.instance)
+            self.new_objects.append(obj)
+
+        manager = self.model._default_manager
+        if self.deleted_objects:
+            manager.filter(pk__in=[obj.pk for obj in self.deleted_objects]).delete()
+        if changed_fields:
+            manager.bulk_update([obj for obj, _ in self.changed_objects], sorted(changed_fields))
+        if self.new_objects:
+            manager.bulk_create(self.new_objects)
+        return self.new_objects + [obj for obj, _ in self.changed_objects]
+
 # Formsets for dynamic addition
-EducationFormSet = inlineformset_factory(Resume, Education, form=EducationForm, extra=1, can_delete=True)
-ExperienceFormSet = inlineformset_factory(Resume, Experience, form=ExperienceForm, extra=1, can_delete=True)
-SkillFormSet = inlineformset_factory(Resume, Skill, form=SkillForm, extra=3, can_delete=True)
-ResearchFormSet = inlineformset_factory(Resume, Research, form=ResearchForm, extra=1, can_delete=True)
-PublicationFormSet = inlineformset_factory(Resume, Publication, form=PublicationForm, extra=1, can_delete=True)
-AwardFormSet = inlineformset_factory(Resume, Award, form=AwardForm, extra=1, can_delete=True)
+EducationFormSet = inlineformset_factory(Resume, Education, form=EducationForm, formset=BulkInlineFormSet, extra=1, can_delete=True)
+ExperienceFormSet = inlineformset_factory(Resume, Experience, form=ExperienceForm, formset=BulkInlineFormSet, extra=1, can_delete=True)
+SkillFormSet = inlineformset_factory(Resume, Skill, form=SkillForm, formset=BulkInlineFormSet, extra=3, can_delete=True)
+ResearchFormSet = inlineformset_factory(Resume, Research, form=ResearchForm, formset=BulkInlineFormSet, extra=1, can_delete=True)
+PublicationFormSet = inlineformset_factory(Resume, Publication, form=PublicationForm, formset=BulkInlineFormSet, extra=1, can_delete=True)
+AwardFormSet = inlineformset_factory(Resume, Award, form=AwardForm, formset=BulkInlineFormSet, extra=1, can_delete=True)
+
+# Form validating each section the autosave endpoint can patch, list
+# sections are keyed by their related name (the formset prefix)
+SECTION_FORMS = {
+    'resume': ResumeForm,
+    'personal': PersonalDetailForm,
+    'education': EducationForm,
+    'experience': ExperienceForm,
+    'skills': SkillForm,
+    'research': ResearchForm,
+    'publications': PublicationForm,
+    'awards': AwardForm,
+}
@@ -0,0 +1,42 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Most recently used fragments of this process, checked before the shared cache
+_recent = OrderedDict()
+_lock = threading.Lock()
+
+
+def cache_key(name, resume, pdf=False):
+    # Versioned keys are never invalidated, a save simply moves on to new ones.
+    # created_at keeps a reused primary key from hitting an old resume's entries.
+    stamp = int(resume.created_at.timestamp() * 1000000)
+    return f'resume-fragment:{resume.pk}:{stamp}:{resume.version}:{name}:{int(pdf)}'
+
+
+def _remember(key, value):
+    with _lock:
+        _recent[key] = value
+        _recent.move_to_end(key)
+        while len(_recent) > settings.RESUME_FRAGMENT_LRU_SIZE:
+            _recent.popitem(last=False)
+
+
+def get(key):
+    with _lock:
+        value = _recent.get(key)
+        if value is not None:
+            _recent.move_to_end(key)
+            return value
+    value = caches[settings.RESUME_FRAGMENT_CACHE].get(key)
+    if value is not None:
+        _remember(key, value)
+    return value
+
+
+def set(key, value):
+    caches[settings.RESUME_FRAGMENT_CACHE].set(key, value, settings.RESUME_FRAGMENT_CACHE_TIMEOUT)
+    _remember(key, value)
+
@@ -0,0 +1,66 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+from .rendering import html_to_pdf
+
+# Build output of `manage.py build_gallery`, served as ordinary static files
+GALLERY_DIR = Path(settings.STATICFILES_DIRS[0]) / 'gallery'
+MANIFEST_NAME = 'manifest.json'
+
+_manifest_cache = {}
+
+
+def load_manifest():
+    # Re-read only when a new build replaced the manifest
+    path = GALLERY_DIR / MANIFEST_NAME
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if _manifest_cache.get('mtime') != mtime:
+        with open(path) as fh:
+            _manifest_cache.update(mtime=mtime, entries=json.load(fh))
+    return _manifest_cache['entries']
+
+
+def write_manifest(entries, output_dir=GALLERY_DIR):
+    with open(Path(output_dir) / MANIFEST_NAME, 'w') as fh:
+        json.dump(entries, fh, indent=2, sort_keys=True)
+
+
+def write_snapshot(code, html, output_dir=GALLERY_DIR):
+    path = Path(output_dir) / f'{code}.html'
+    path.write_text(html, encoding='utf-8')
+    return f'gallery/{path.name}'
+
+
+def rasterizer():
+    # WeasyPrint dropped PNG output in v53, the first PDF page is rasterized
+    # with poppler when it is installed
+    return shutil.which('pdftoppm')
+
+
+def write_thumbnails(code, html, width, output_dir=GALLERY_DIR):
+    from PIL import Image
+
+    output_dir = Path(output_dir)
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = Path(tmp) / 'page.pdf'
+        pdf_path.write_bytes(html_to_pdf(html, code))
+        subprocess.run(
+            [rasterizer(), '-png', '-f', '1', '-l', '1', '-r', '96', '-singlefile',
+             str(pdf_path), str(Path(tmp) / 'page')],
+            check=True, capture_output=True,
+        )
+        with Image.open(Path(tmp) / 'page.png') as page:
+            page.thumbnail((width, width * 2), Image.LANCZOS)
+            page = page.convert('RGB')
+            page.save(output_dir / f'{code}.png', optimize=True)
+            page.save(output_dir / f'{code}.webp', quality=80, method=6)
+    return {'png': f'gallery/{code}.png', 'webp': f'gallery/{code}.webp'}
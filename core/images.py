@@ -0,0 +1,120 @@
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+# Square bounding boxes in pixels, the templates show the photo at 100-200px
+VARIANT_SIZES = (150, 300, 600)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _normalized(original):
+    from PIL import Image, ImageOps
+
+    # Phone JPEGs are decoded at a reduced scale straight away, the largest
+    # variant never needs more pixels than this
+    original.draft('RGB', (VARIANT_SIZES[-1], VARIANT_SIZES[-1]))
+    image = ImageOps.exif_transpose(original).convert('RGBA')
+    # Pixels are copied onto a fresh image so EXIF, GPS and XMP data stay
+    # behind, transparency is flattened onto white for JPEG
+    clean = Image.new('RGB', image.size, 'white')
+    clean.paste(image, mask=image)
+    return clean
+
+
+def build_variants(field_file):
+    from PIL import Image, ImageOps
+
+    with field_file.open('rb') as fh, Image.open(fh) as original:
+        image = _normalized(original)
+
+    stem = os.path.splitext(os.path.basename(field_file.name))[0]
+    short_side = min(image.size)
+    variants = {'source': field_file.name, 'sizes': {}}
+    for size in VARIANT_SIZES:
+        # Small uploads are never scaled up, the last variant is the photo as is
+        scaled = ImageOps.cover(image, (size, size)) if short_side > size else image
+        files = {}
+        for fmt, (pil_format, extension, options) in VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            scaled.save(buffer, pil_format, **options)
+            files[fmt] = default_storage.save(
+                f'profile_pics/variants/{stem}-{size}.{extension}', ContentFile(buffer.getvalue()))
+        variants['sizes'][str(size)] = files
+        if short_side <= size:
+            break
+    return variants
+
+
+def delete_variants(variants):
+    for files in variants.get('sizes', {}).values():
+        for name in files.values():
+            default_storage.delete(name)
+
+
+def _replace_variants(detail, source, old):
+    from .models import bump_version
+
+    try:
+        variants = build_variants(detail.image) if source else {}
+    except Exception:
+        # The save has committed by now. A photo Pillow cannot read (truncated,
+        # too many pixels) is served as uploaded instead of failing the request.
+        logger.exception('Could not build image variants of %s', source)
+        variants = {}
+    updated = type(detail).objects.filter(pk=detail.pk, image=source or '').update(image_variants=variants)
+    if not updated:
+        # The photo was replaced again meanwhile, that save builds its own
+        delete_variants(variants)
+        return
+    detail.image_variants = variants
+    # Cached headers link the old files
+    bump_version(detail.resume_id)
+    delete_variants(old)
+
+
+def refresh_variants(detail, force=False):
+    # Rebuilds the variants when the upload changed, writing only their
+    # column. Runs once the caller's transaction commits, so a rollback
+    # leaves the row and its files as they were and the transaction is not
+    # held open while images are encoded.
+    old = detail.image_variants or {}
+    source = detail.image.name or None
+    if not force and old.get('source') == source:
+        return False
+    transaction.on_commit(lambda: _replace_variants(detail, source, old), robust=True)
+    return True
+
+
+def delete_detail_variants(sender, instance, **kwargs):
+    # post_delete receiver of PersonalDetail, also sent when its resume is
+    # deleted. The files go once the deletion commits.
+    variants = instance.image_variants or {}
+    if variants:
+        transaction.on_commit(lambda: delete_variants(variants), robust=True)
+
+
+def variant_url(detail, width, fmt='jpeg'):
+    # Smallest variant covering the requested width, else the largest there is
+    sizes = (getattr(detail, 'image_variants', None) or {}).get('sizes', {})
+    if not sizes:
+        return detail.image.url if getattr(detail, 'image', None) else ''
+    fitting = [int(size) for size in sizes if int(size) >= width]
+    size = min(fitting) if fitting else max(int(size) for size in sizes)
+    return default_storage.url(sizes[str(size)][fmt])
+
+
+def backfill(detail_id, force=False):
+    # Runs in a worker process of the build_image_variants command
+    from .models import PersonalDetail
+
+    detail = PersonalDetail.objects.get(pk=detail_id)
+    return refresh_variants(detail, force=force)
@@ -0,0 +1,383 @@
+import csv
+import json
+import time
+from datetime import date
+from types import SimpleNamespace
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import search
+from .demo import Section
+from .models import Award, Education, Experience, PersonalDetail, Publication, Research, Resume, Skill
+
+# Bulk import of JSON Resume (https://jsonresume.org/schema) documents and
+# CSV rows. Files are read as a stream and written in batches with
+# bulk_create, a bad record is reported and skipped without failing the rest.
+
+# CSV columns, one resume per row. Skills are "Name:90; Name" (proficiency
+# optional), the other sections JSON arrays shaped like in JSON Resume.
+CSV_COLUMNS = [
+    'title', 'doc_type', 'template_name', 'name', 'email', 'phone', 'address', 'linkedin', 'website', 'summary',
+    'skills', 'work', 'education', 'projects', 'publications', 'awards',
+]
+CSV_JSON_COLUMNS = ['work', 'education', 'projects', 'publications', 'awards']
+
+
+class RecordError(ValueError):
+    pass
+
+
+class ImportResult:
+    def __init__(self):
+        self.records = 0
+        self.resumes = 0
+        self.rows = 0
+        # (record number, message), numbered from 1 in file order
+        self.errors = []
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def as_dict(self, max_errors=None):
+        return {
+            'records': self.records,
+            'resumes': self.resumes,
+            'rows': self.rows,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'error_count': len(self.errors),
+            'errors': [{'record': number, 'error': message} for number, message in self.errors[:max_errors]],
+        }
+
+
+# Longest document (or JSON line) read before the import gives up on it, in
+# characters
+MAX_DOCUMENT_SIZE = 4 * 1024 * 1024
+
+
+def iter_json(stream, chunk_size=64 * 1024, max_size=MAX_DOCUMENT_SIZE):
+    # Documents from a text stream holding one per line (JSON Lines), an
+    # array of them or a single document, decoded one at a time so the file
+    # is never in memory whole. A document that does not decode is yielded as
+    # a RecordError.
+    line = stream.readline(max_size + 1)
+    while line and not line.strip():
+        line = stream.readline(max_size + 1)
+    first = line.strip()
+    if first.startswith('{') and (first.endswith('}') or len(line) > max_size):
+        yield from _iter_lines(stream, line, max_size)
+    else:
+        yield from _iter_buffered(stream, line, chunk_size, max_size)
+
+
+def _iter_lines(stream, line, max_size):
+    # JSON Lines: a bad line is that record's error, the next line starts afresh
+    while line:
+        if len(line) > max_size:
+            yield RecordError(f'Longer than {max_size} characters, skipped')
+            while line and not line.endswith('\n'):
+                line = stream.readline(max_size + 1)
+        elif line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield RecordError(f'Invalid JSON: {exc}')
+        line = stream.readline(max_size + 1)
+
+
+def _iter_buffered(stream, buffer, chunk_size, max_size):
+    # An array or pretty-printed documents: nothing after a document that
+    # does not decode can be trusted, so the first one stops the import
+    decoder = json.JSONDecoder()
+    eof = False
+    while True:
+        # Whitespace and array punctuation between documents
+        buffer = buffer.lstrip(' \t\r\n,[]')
+        if buffer:
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError as exc:
+                if eof:
+                    yield RecordError(f'Invalid JSON, import stopped: {exc.msg}')
+                    return
+                if len(buffer) > max_size:
+                    yield RecordError(f'Invalid JSON or longer than {max_size} characters, import stopped')
+                    return
+            else:
+                buffer = buffer[end:]
+                yield record
+                continue
+        elif eof:
+            return
+        # Growing reads keep the retried decodes linear in the document size
+        chunk = stream.read(max(chunk_size, len(buffer)))
+        eof = not chunk
+        buffer += chunk
+
+
+def _cell(row, column):
+    return (row.get(column) or '').strip()
+
+
+def from_csv_row(row):
+    document = {
+        'basics': {
+            'name': _cell(row, 'name'),
+            'email': _cell(row, 'email'),
+            'phone': _cell(row, 'phone'),
+            'location': {'address': _cell(row, 'address')},
+            'url': _cell(row, 'website'),
+            'summary': _cell(row, 'summary'),
+            'profiles': [{'network': 'LinkedIn', 'url': _cell(row, 'linkedin')}],
+        },
+        'meta': {'title': _cell(row, 'title'), 'docType': _cell(row, 'doc_type'),
+                 'template': _cell(row, 'template_name')},
+        'skills': [],
+    }
+    for entry in _cell(row, 'skills').split(';'):
+        name, _, level = entry.partition(':')
+        if name.strip():
+            document['skills'].append({'name': name.strip(), 'level': level.strip()})
+    for column in CSV_JSON_COLUMNS:
+        value = _cell(row, column)
+        if not value:
+            continue
+        try:
+            document[column] = json.loads(value)
+        except ValueError as exc:
+            raise RecordError(f'{column}: not valid JSON ({exc})')
+    return document
+
+
+def _date(value, field):
+    # JSON Resume dates are YYYY-MM-DD, YYYY-MM or YYYY
+    if not value:
+        return None
+    try:
+        parts = [int(part) for part in str(value).split('-')]
+        return date(*parts, *[1] * (3 - len(parts)))
+    except (TypeError, ValueError):
+        raise RecordError(f'{field}: "{value}" is not a date (YYYY-MM-DD, YYYY-MM or YYYY)')
+
+
+def _text(value):
+    return str(value).strip() if value is not None else ''
+
+
+def _description(entry):
+    lines = [_text(entry.get('summary') or entry.get('description'))]
+    lines += [f'- {_text(highlight)}' for highlight in entry.get('highlights') or []]
+    return '\n'.join(line for line in lines if line)
+
+
+def _proficiency(level):
+    # Numeric levels are percentages, words like "Advanced" keep the default
+    try:
+        return max(0, min(100, int(float(level))))
+    except (TypeError, ValueError):
+        return Skill._meta.get_field('proficiency').default
+
+
+def _list(document, key):
+    value = document.get(key) or []
+    if not isinstance(value, list):
+        raise RecordError(f'{key}: expected a list')
+    for index, entry in enumerate(value):
+        if not isinstance(entry, dict):
+            raise RecordError(f'{key}[{index}]: expected an object')
+    return value
+
+
+def _address(location):
+    if not isinstance(location, dict):
+        return _text(location)
+    parts = [location.get(key) for key in ('address', 'city', 'region', 'postalCode', 'countryCode')]
+    return ', '.join(_text(part) for part in parts if _text(part))
+
+
+def _linkedin(basics):
+    for profile in basics.get('profiles') or []:
+        if isinstance(profile, dict) and _text(profile.get('network')).lower() == 'linkedin':
+            return _text(profile.get('url'))
+    return ''
+
+
+def from_json_resume(document, user, defaults=None):
+    # (resume, personal detail, child rows) for one document, unsaved and
+    # validated. Raises RecordError or ValidationError.
+    if not isinstance(document, dict):
+        raise RecordError('expected a JSON object')
+    defaults = defaults or {}
+    basics = document.get('basics') or {}
+    meta = document.get('meta') or {}
+    if not isinstance(basics, dict) or not isinstance(meta, dict):
+        raise RecordError('basics and meta must be objects')
+
+    sections = {key: _list(document, key) for key in ('work', 'education', 'skills', 'projects', 'publications', 'awards')}
+    academic = sections['projects'] or sections['publications'] or sections['awards']
+    resume = Resume(
+        user=user,
+        title=_text(meta.get('title') or basics.get('label')) or Resume._meta.get_field('title').default,
+        doc_type=_text(meta.get('docType')) or defaults.get('doc_type') or ('cv' if academic else 'resume'),
+        template_name=_text(meta.get('template')) or defaults.get('template_name') or 'modern',
+    )
+    detail = PersonalDetail(
+        full_name=_text(basics.get('name')),
+        email=_text(basics.get('email')),
+        phone=_text(basics.get('phone')),
+        address=_address(basics.get('location') or ''),
+        linkedin_url=_linkedin(basics),
+        portfolio_url=_text(basics.get('url')),
+        summary=_text(basics.get('summary')),
+    )
+    rows = []
+    for index, entry in enumerate(sections['work']):
+        end = _date(entry.get('endDate'), f'work[{index}].endDate')
+        rows.append(Experience(
+            company=_text(entry.get('name') or entry.get('company')),
+            position=_text(entry.get('position')),
+            start_date=_date(entry.get('startDate'), f'work[{index}].startDate'),
+            end_date=end,
+            is_current=end is None,
+            description=_description(entry),
+        ))
+    for index, entry in enumerate(sections['education']):
+        end = _date(entry.get('endDate'), f'education[{index}].endDate')
+        rows.append(Education(
+            institution=_text(entry.get('institution')),
+            degree=' '.join(_text(entry.get(key)) for key in ('studyType', 'area') if _text(entry.get(key))),
+            start_date=_date(entry.get('startDate'), f'education[{index}].startDate'),
+            end_date=end,
+            is_current=end is None,
+            description='\n'.join(f'- {_text(course)}' for course in entry.get('courses') or []),
+        ))
+    for entry in sections['skills']:
+        rows.append(Skill(name=_text(entry.get('name')), proficiency=_proficiency(entry.get('level'))))
+    for index, entry in enumerate(sections['projects']):
+        rows.append(Research(
+            title=_text(entry.get('name')),
+            description=_description(entry),
+            date=_date(entry.get('endDate') or entry.get('startDate'), f'projects[{index}].date'),
+        ))
+    for index, entry in enumerate(sections['publications']):
+        rows.append(Publication(
+            title=_text(entry.get('name')),
+            publisher=_text(entry.get('publisher')),
+            date=_date(entry.get('releaseDate'), f'publications[{index}].releaseDate'),
+            url=_text(entry.get('url')),
+        ))
+    for index, entry in enumerate(sections['awards']):
+        rows.append(Award(
+            title=_text(entry.get('title')),
+            issuer=_text(entry.get('awarder')),
+            date=_date(entry.get('date'), f'awards[{index}].date'),
+        ))
+
+    # Unique checks would query per record, the resume foreign keys are set
+    # once the batch is inserted
+    resume.full_clean(exclude=['user'], validate_unique=False)
+    detail.full_clean(exclude=['resume'], validate_unique=False)
+    for row in rows:
+        try:
+            row.full_clean(exclude=['resume'], validate_unique=False)
+        except ValidationError as exc:
+            raise RecordError(f'{row._meta.verbose_name} "{row}": {_error_message(exc)}')
+
+    # Indexed from memory instead of reading the rows back after the insert
+    by_model = {}
+    for row in rows:
+        by_model.setdefault(type(row), []).append(row)
+    resume.search_document = search.document_text(SimpleNamespace(
+        title=resume.title,
+        personal_detail=detail,
+        skills=Section(by_model.get(Skill, [])),
+        experience=Section(by_model.get(Experience, [])),
+        education=Section(by_model.get(Education, [])),
+        research=Section(by_model.get(Research, [])),
+        publications=Section(by_model.get(Publication, [])),
+        awards=Section(by_model.get(Award, [])),
+    ))
+    return resume, detail, rows
+
+
+def from_csv_document(row, user, defaults=None):
+    return from_json_resume(from_csv_row(row), user, defaults)
+
+
+def _error_message(exc):
+    if isinstance(exc, ValidationError) and hasattr(exc, 'error_dict'):
+        return '; '.join(f'{field}: {" ".join(messages)}' for field, messages in exc.message_dict.items())
+    if isinstance(exc, ValidationError):
+        return ' '.join(exc.messages)
+    return str(exc)
+
+
+def _insert(batch):
+    # One transaction per batch: resumes first for their primary keys, then
+    # every child table in one statement each
+    with transaction.atomic():
+        Resume.objects.bulk_create([resume for resume, _, _ in batch])
+        details = []
+        children = {}
+        for resume, detail, rows in batch:
+            detail.resume = resume
+            details.append(detail)
+            for row in rows:
+                row.resume = resume
+                children.setdefault(type(row), []).append(row)
+        PersonalDetail.objects.bulk_create(details)
+        for model, rows in children.items():
+            model.objects.bulk_create(rows)
+        search.index_new([(resume.pk, resume.search_document) for resume, _, _ in batch])
+    return len(batch) * 2 + sum(len(rows) for rows in children.values())
+
+
+def import_records(records, user, convert=from_json_resume, batch_size=500, defaults=None, progress=None):
+    # records: documents (or RecordErrors) from iter_json, or csv.DictReader
+    # rows with convert=from_csv_document. progress(result) is called after
+    # each batch.
+    result = ImportResult()
+    started = time.perf_counter()
+    batch = []
+
+    def flush():
+        result.rows += _insert(batch)
+        result.resumes += len(batch)
+        batch.clear()
+        if progress:
+            progress(result)
+
+    try:
+        for number, record in enumerate(records, start=1):
+            result.records = number
+            try:
+                if isinstance(record, RecordError):
+                    raise record
+                batch.append(convert(record, user, defaults))
+            except (RecordError, ValidationError) as exc:
+                result.errors.append((number, _error_message(exc)))
+            if len(batch) >= batch_size:
+                flush()
+    except (UnicodeDecodeError, csv.Error) as exc:
+        # The rest of the file cannot be read, the records before it are
+        # still imported
+        result.records += 1
+        message = f'Not UTF-8 text ({exc.reason})' if isinstance(exc, UnicodeDecodeError) else f'Invalid CSV ({exc})'
+        result.errors.append((result.records, f'{message}, import stopped'))
+    if batch:
+        flush()
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def detect_format(filename):
+    return 'csv' if filename.lower().endswith('.csv') else 'json'
+
+
+def import_stream(stream, user, file_format='json', batch_size=500, defaults=None, progress=None):
+    if file_format == 'csv':
+        return import_records(csv.DictReader(stream), user, from_csv_document, batch_size, defaults, progress)
+    return import_records(iter_json(stream), user, from_json_resume, batch_size, defaults, progress)
@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import pdf_cache
+from .models import ExportJob, Resume
+from .rendering import render_pdf
+
+
+class QueueFull(Exception):
+    pass
+
+
+class TooManyJobs(Exception):
+    pass
+
+
+def enqueue_pdf(user, resume):
+    template_name = resume.template_name
+    with transaction.atomic():
+        active = ExportJob.objects.filter(status__in=ExportJob.ACTIVE_STATUSES)
+        # Repeated clicks on the same download share one job
+        existing = active.filter(user=user, resume=resume, template_name=template_name).first()
+        if existing is not None:
+            return existing
+        if active.filter(user=user).count() >= settings.EXPORT_JOBS_PER_USER:
+            raise TooManyJobs
+        if active.count() >= settings.EXPORT_QUEUE_MAX_PENDING:
+            raise QueueFull
+
+        job = ExportJob(user=user, resume=resume, template_name=template_name)
+        cache_key = pdf_cache.cache_key(resume, template_name)
+        cached = pdf_cache.open_cached(resume, cache_key)
+        if cached is not None:
+            # Nothing to render, the job is born finished
+            cached.close()
+            job.status = ExportJob.STATUS_DONE
+            job.cache_key = cache_key
+            job.finished_at = timezone.now()
+        job.save()
+    return job
+
+
+def claim_next():
+    # Compare-and-set on the status column, safe with several supervisors
+    # polling the same table and with backends lacking SELECT ... FOR UPDATE
+    while True:
+        job_id = (ExportJob.objects.filter(status=ExportJob.STATUS_QUEUED)
+                  .order_by('created_at').values_list('pk', flat=True).first())
+        if job_id is None:
+            return None
+        claimed = ExportJob.objects.filter(pk=job_id, status=ExportJob.STATUS_QUEUED).update(
+            status=ExportJob.STATUS_RUNNING, started_at=timezone.now())
+        if claimed:
+            return job_id
+
+
+def requeue_stale():
+    # Jobs left running by a worker that died are put back in the queue
+    cutoff = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)
+    return ExportJob.objects.filter(status=ExportJob.STATUS_RUNNING, started_at__lt=cutoff).update(
+        status=ExportJob.STATUS_QUEUED, started_at=None)
+
+
+def run_job(job_id):
+    job = ExportJob.objects.get(pk=job_id)
+    resume = Resume.objects.with_content().get(pk=job.resume_id)
+    try:
+        cache_key = pdf_cache.cache_key(resume, job.template_name)
+        cached = pdf_cache.open_cached(resume, cache_key)
+        if cached is None:
+            pdf = render_pdf(resume, job.template_name)
+            pdf_cache.store(resume, cache_key, pdf)
+        else:
+            cached.close()
+    except Exception as exc:
+        job.status = ExportJob.STATUS_FAILED
+        job.error = str(exc)
+    else:
+        job.status = ExportJob.STATUS_DONE
+        job.cache_key = cache_key
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'cache_key', 'error', 'finished_at'])
+    return job.status
+
+
+def fail_job(job_id, error):
+    # Used by the supervisor when a worker process dies mid-render
+    ExportJob.objects.filter(pk=job_id).update(
+        status=ExportJob.STATUS_FAILED, error=error, finished_at=timezone.now())
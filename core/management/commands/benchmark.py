@@ -0,0 +1,146 @@
+import json
+import logging
+import platform
+import tempfile
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway test database and measure the core views: latency percentiles, '
+            'queries per request and peak RSS, written as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5, help='Users to seed (default: 5).')
+        parser.add_argument('--resumes', type=int, default=4, help='Documents per user, every other one a CV (default: 4).')
+        parser.add_argument('--publications', type=int, default=60, help='Publications on each CV (default: 60).')
+        parser.add_argument('--iterations', type=int, default=30, help='Measured requests per scenario (default: 30).')
+        parser.add_argument('--warmup', type=int, default=1, help='Unmeasured requests first (default: 1).')
+        parser.add_argument(
+            '--templates', nargs='+', metavar='TEMPLATE',
+            help='Templates for view_resume (default: every template that exists).',
+        )
+        parser.add_argument(
+            '--format', nargs='+', dest='formats', default=['txt', 'doc', 'pdf'], choices=['txt', 'doc', 'pdf'],
+            help='Export formats to measure (default: txt doc pdf).',
+        )
+        parser.add_argument(
+            '--server', action='store_true',
+            help='Send the requests over HTTP to a local WSGI server instead of the test client.',
+        )
+        parser.add_argument(
+            '--mixed', action='store_true',
+            help='Instead of one view at a time, send previews and exports from concurrent clients '
+                 'through the WSGI and then the ASGI handler, with PDFs never served from the cache.',
+        )
+        parser.add_argument('--concurrency', type=int, default=8, help='Clients at once with --mixed (default: 8).')
+        parser.add_argument(
+            '--mixed-format', default='pdf', choices=['txt', 'doc', 'pdf'],
+            help='Export format of the --mixed traffic (default: pdf).',
+        )
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+        parser.add_argument('--baseline', help='JSON report of an earlier run to compare against.')
+        parser.add_argument(
+            '--tolerance', type=float,
+            help='With --baseline, fail if a latency percentile grew by more than this many percent '
+                 'or the queries per request grew at all.',
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            baseline = json.loads(Path(options['baseline']).read_text())['results']
+
+        # Nothing touches the configured database or media: the data goes
+        # into a test database, files into a temporary directory
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with tempfile.TemporaryDirectory() as media:
+                if options['mixed']:
+                    pdf_storage = {'BACKEND': 'core.benchmark.UncachedPDFStorage'}
+                else:
+                    pdf_storage = {
+                        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                        'OPTIONS': {'location': f'{media}/pdf'},
+                    }
+                with override_settings(
+                    ALLOWED_HOSTS=['testserver', '127.0.0.1', 'localhost'],
+                    MEDIA_ROOT=media,
+                    STORAGES={**settings.STORAGES, 'pdf_cache': pdf_storage},
+                    EXPORT_ASYNC_PDF=False,
+                ):
+                    report = self.measure(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        rendered = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(rendered + '\n')
+            self.stderr.write(f'Report written to {options["output"]}')
+        else:
+            self.stdout.write(rendered)
+
+        for name, result in report['results'].items():
+            if result['errors']:
+                self.stderr.write(self.style.WARNING(f'{name}: {result["errors"]} request(s) failed'))
+        if baseline is not None:
+            self.report_comparison(benchmark.compare(report['results'], baseline, options['tolerance']))
+
+    def measure(self, options):
+        owners = benchmark.seed(options['users'], options['resumes'], options['publications'])
+        # Failed requests are counted in the report instead of logged one by one
+        request_logger = logging.getLogger('django.request')
+        request_logger.disabled = True
+        try:
+            if options['mixed']:
+                driver_name = f'mixed-{options["mixed_format"]}-x{options["concurrency"]}'
+                requests = benchmark.mixed_requests(owners, options['mixed_format'])
+                results = {}
+                for handler in ('wsgi', 'asgi'):
+                    results.update(benchmark.run_mixed(
+                        handler, requests, options['concurrency'], options['iterations'], options['warmup']))
+            else:
+                driver_name = 'wsgi' if options['server'] else 'test-client'
+                templates = options['templates'] or benchmark.available_templates()
+                plan = benchmark.scenarios(owners, templates, options['formats'])
+                driver = benchmark.WSGIServerDriver() if options['server'] else benchmark.TestClientDriver()
+                try:
+                    results = benchmark.run(driver, plan, options['iterations'], options['warmup'])
+                finally:
+                    driver.close()
+        finally:
+            request_logger.disabled = False
+        return {
+            'meta': {
+                'driver': driver_name,
+                'database': connection.vendor,
+                'users': options['users'],
+                'resumes_per_user': options['resumes'],
+                'publications_per_cv': options['publications'],
+                'iterations': options['iterations'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'peak_rss_kb': benchmark.peak_rss_kb(),
+            },
+            'results': results,
+        }
+
+    def report_comparison(self, rows):
+        regressions = 0
+        for name, metric, old, new, change, regressed in rows:
+            line = f'{name:<32} {metric:<13} {old:10.2f} -> {new:10.2f} ({change:+6.1f}%)'
+            if regressed:
+                regressions += 1
+                self.stderr.write(self.style.ERROR(line))
+            else:
+                self.stderr.write(line)
+        if regressions:
+            raise CommandError(f'{regressions} metric(s) regressed beyond the tolerance')
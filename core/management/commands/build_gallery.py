@@ -0,0 +1,60 @@
+from django.contrib.staticfiles.storage import ManifestFilesMixin, staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.template import TemplateDoesNotExist
+
+from core import demo, gallery
+from core.models import Resume
+
+
+class Command(BaseCommand):
+    help = 'Render every resume template with the demo data into static gallery snapshots and thumbnails.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--width', type=int, default=400,
+            help='Thumbnail width in pixels.',
+        )
+        parser.add_argument(
+            '--no-thumbnails', action='store_true',
+            help='Only write the HTML snapshots.',
+        )
+
+    def handle(self, *args, **options):
+        thumbnails = not options['no_thumbnails']
+        if thumbnails and gallery.rasterizer() is None:
+            self.stderr.write('pdftoppm (poppler-utils) not found, skipping thumbnails.')
+            thumbnails = False
+
+        # Snapshots link the hashed stylesheet names, which only exist after
+        # collectstatic. The snapshots themselves get hashed names from a
+        # second collectstatic.
+        hashed = isinstance(staticfiles_storage, ManifestFilesMixin)
+        if hashed and not staticfiles_storage.hashed_files:
+            raise CommandError('No staticfiles manifest, run collectstatic before build_gallery.')
+
+        gallery.GALLERY_DIR.mkdir(parents=True, exist_ok=True)
+        entries = {}
+        for code, name in Resume.TEMPLATE_CHOICES:
+            try:
+                html, _ = demo.render(code)
+            except TemplateDoesNotExist as exc:
+                self.stderr.write(f'{code}: template missing ({exc})')
+                continue
+            except ValueError as exc:
+                # A static file missing from the manifest
+                self.stderr.write(f'{code}: {exc}, run collectstatic again')
+                continue
+
+            entry = {'html': gallery.write_snapshot(code, html)}
+            if thumbnails:
+                try:
+                    entry.update(gallery.write_thumbnails(code, html, options['width']))
+                except Exception as exc:
+                    self.stderr.write(f'{code}: thumbnail failed ({exc})')
+            entries[code] = entry
+            self.stdout.write(f'{code}: {", ".join(sorted(entry))}')
+
+        gallery.write_manifest(entries)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(entries)} gallery entries to {gallery.GALLERY_DIR}'))
+        if hashed:
+            self.stdout.write('Run collectstatic again to add the snapshots to the manifest.')
@@ -0,0 +1,50 @@
+import os
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from core import images
+from core.models import PersonalDetail
+from core.workers import process_pool
+
+
+class Command(BaseCommand):
+    help = 'Generate the resized variants of profile images uploaded before they existed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Number of processes resizing images (default: one per CPU).',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Rebuild the variants of every image, not just the missing or stale ones.',
+        )
+
+    def handle(self, *args, **options):
+        force = options['force']
+        rows = PersonalDetail.objects.exclude(image='').values_list('pk', 'image', 'image_variants')
+        detail_ids = [pk for pk, image, variants in rows if force or (variants or {}).get('source') != image]
+        if not detail_ids:
+            self.stdout.write('All profile images are up to date.')
+            return
+        self.stdout.write(f'Processing {len(detail_ids)} profile image(s) with {options["workers"]} worker(s).')
+
+        failed = 0
+        with process_pool(options['workers']) as pool:
+            futures = {pool.submit(images.backfill, pk, force): pk for pk in detail_ids}
+            for done, future in enumerate(as_completed(futures), start=1):
+                pk = futures[future]
+                try:
+                    future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'[{done}/{len(detail_ids)}] personal detail {pk} failed: {exc}')
+                else:
+                    self.stdout.write(f'[{done}/{len(detail_ids)}] personal detail {pk}')
+
+        message = f'Processed {len(detail_ids) - failed} image(s)'
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{message}, {failed} failed.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,50 @@
+import os
+from concurrent.futures import as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import precompress
+from core.workers import process_pool
+
+
+class Command(BaseCommand):
+    help = 'Write .gz and .br files next to the collected static files, for the front proxy to serve as they are.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Number of processes compressing files (default: one per CPU).',
+        )
+        parser.add_argument(
+            '--min-size', type=int, default=256,
+            help='Skip files smaller than this many bytes (default: 256).',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Compress every file again, not just the new or changed ones.',
+        )
+
+    def handle(self, *args, **options):
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            raise CommandError(f'{root} does not exist, run collectstatic first.')
+        paths = list(precompress.candidates(root, options['min_size']))
+        if not paths:
+            self.stdout.write('Nothing to compress.')
+            return
+
+        totals = [0, 0, 0]
+        with process_pool(options['workers']) as pool:
+            futures = {pool.submit(precompress.compress_file, path, options['force']): path for path in paths}
+            for future in as_completed(futures):
+                original, gz, br = future.result()
+                totals[0] += original
+                # Files that did not shrink are served as they are
+                totals[1] += original if gz is None else gz
+                totals[2] += original if br is None else br
+
+        original, gz, br = totals
+        self.stdout.write(self.style.SUCCESS(
+            f'Compressed {len(paths)} file(s): {original / 1024:.0f} KiB, '
+            f'{gz / 1024:.0f} KiB gzip, {br / 1024:.0f} KiB brotli.'))
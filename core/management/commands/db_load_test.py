@@ -0,0 +1,107 @@
+import threading
+import time
+import uuid
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+
+from core import exporters
+from core.models import Experience, PersonalDetail, Resume, Skill
+
+
+def _edit(resume_id, n):
+    # What a save from the editor writes: the resume row and a changed entry
+    with transaction.atomic():
+        resume = Resume.objects.get(pk=resume_id)
+        resume.title = f'Load test {n}'
+        resume.save()
+        Experience.objects.filter(resume_id=resume_id).update(description=f'Revision {n}')
+
+
+def _export(resume_id, n):
+    resume = Resume.objects.with_content().get(pk=resume_id)
+    b''.join(exporters.iter_resume_text(resume))
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0
+
+
+class Command(BaseCommand):
+    help = 'Run concurrent edits and exports against the configured database and report throughput.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Concurrent clients, half of them editing and half exporting (default: 8).',
+        )
+        parser.add_argument(
+            '--seconds', type=float, default=10,
+            help='How long to run (default: 10).',
+        )
+        parser.add_argument(
+            '--resumes', type=int, default=20,
+            help='Scratch resumes created for the run and deleted afterwards (default: 20).',
+        )
+
+    def setup(self, count):
+        user = User.objects.create_user(f'load-test-{uuid.uuid4().hex[:12]}')
+        ids = []
+        for i in range(count):
+            resume = Resume.objects.create(user=user, title=f'Load test {i}', doc_type='resume')
+            PersonalDetail.objects.create(resume=resume, full_name='Load Test', email='load@example.com', phone='0')
+            Experience.objects.bulk_create([
+                Experience(resume=resume, company=f'Company {j}', position='Engineer', start_date=date(2015, 1, 1))
+                for j in range(5)])
+            Skill.objects.bulk_create([Skill(resume=resume, name=f'Skill {j}') for j in range(10)])
+            ids.append(resume.pk)
+        return user, ids
+
+    def client(self, kind, operation, resume_ids, deadline, results, offset):
+        latencies, errors = [], []
+        n = offset
+        try:
+            while time.monotonic() < deadline:
+                n += 1
+                started = time.perf_counter()
+                try:
+                    operation(resume_ids[n % len(resume_ids)], n)
+                except OperationalError as exc:
+                    errors.append(str(exc))
+                else:
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+        results.append((kind, latencies, errors))
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Database: {connection.vendor} ({connection.settings_dict["NAME"]})')
+        user, resume_ids = self.setup(options['resumes'])
+        results = []
+        try:
+            deadline = time.monotonic() + options['seconds']
+            threads = []
+            for i in range(max(options['threads'], 2)):
+                kind, operation = ('edit', _edit) if i % 2 == 0 else ('export', _export)
+                threads.append(threading.Thread(
+                    target=self.client, args=(kind, operation, resume_ids, deadline, results, i * 1000)))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            user.delete()
+
+        for kind in ('edit', 'export'):
+            latencies = [value for name, values, _ in results if name == kind for value in values]
+            errors = [error for name, _, values in results if name == kind for error in values]
+            self.stdout.write(
+                f'{kind:<7} {len(latencies) / options["seconds"]:8.1f}/s  '
+                f'p50 {_percentile(latencies, 0.5) * 1000:7.2f} ms  '
+                f'p95 {_percentile(latencies, 0.95) * 1000:7.2f} ms  '
+                f'errors {len(errors)}')
+            for error in sorted(set(errors)):
+                self.stdout.write(self.style.WARNING(f'        {error}'))
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import exporters
+from core.bulk_export import iter_exports, select_resumes, stream_zip
+
+
+class Command(BaseCommand):
+    help = 'Export many resumes into one ZIP file, rendering them in parallel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the ZIP file to write.')
+        parser.add_argument('--ids', nargs='+', type=int, default=[], help='Resume ids to export.')
+        parser.add_argument('--user', dest='usernames', action='append', default=[],
+                            help='Export every resume of this user (repeatable).')
+        parser.add_argument('--all', action='store_true', help='Export every resume.')
+        parser.add_argument('--format', dest='formats', nargs='+', default=['pdf'],
+                            choices=sorted(exporters.CONTENT_TYPES), help='Export formats.')
+        parser.add_argument('--workers', type=int, default=settings.BULK_EXPORT_WORKERS,
+                            help='Number of render processes (default: BULK_EXPORT_WORKERS).')
+
+    def handle(self, *args, **options):
+        if not (options['ids'] or options['usernames'] or options['all']):
+            raise CommandError('Pass --ids, --user or --all.')
+
+        resume_ids = list(select_resumes(options['ids'], options['usernames']))
+        formats = options['formats']
+        total = len(resume_ids) * len(formats)
+        self.stdout.write(f'Exporting {len(resume_ids)} resume(s) as {", ".join(formats)}.')
+
+        failed = 0
+
+        def progress(done, total, result):
+            nonlocal failed
+            if result.error is None:
+                self.stdout.write(f'[{done}/{total}] {result.arcname}')
+            else:
+                failed += 1
+                self.stderr.write(f'[{done}/{total}] resume {result.resume_id} ({result.export_format}) failed: {result.error}')
+
+        results = iter_exports(resume_ids, formats, options['workers'])
+        with open(options['output'], 'wb') as fh:
+            for chunk in stream_zip(results, total, progress=progress):
+                fh.write(chunk)
+
+        message = f'Wrote {total - failed} document(s) to {options["output"]}'
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{message}, {failed} failed (see errors.txt in the archive).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,54 @@
+import sys
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core import importer
+from core.models import Resume
+
+
+class Command(BaseCommand):
+    help = 'Import resumes from a JSON Resume file (one document, an array or JSON Lines) or a CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, - for standard input.')
+        parser.add_argument('--user', required=True, help='Username that owns the imported resumes.')
+        parser.add_argument('--format', dest='file_format', choices=['json', 'csv'],
+                            help='Input format (default: from the file extension, else json).')
+        parser.add_argument('--batch-size', type=int, default=settings.IMPORT_BATCH_SIZE,
+                            help='Records inserted per transaction (default: IMPORT_BATCH_SIZE).')
+        parser.add_argument('--doc-type', choices=[code for code, _ in Resume.DOC_TYPE_CHOICES],
+                            help='Document type of records that do not set one.')
+        parser.add_argument('--template', dest='template_name', choices=[code for code, _ in Resume.TEMPLATE_CHOICES],
+                            help='Template of records that do not set one (default: modern).')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["user"]}.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        path = options['path']
+        file_format = options['file_format'] or importer.detect_format(path)
+        defaults = {'doc_type': options['doc_type'], 'template_name': options['template_name']}
+
+        def progress(result):
+            self.stdout.write(f'{result.resumes} resume(s) imported, {len(result.errors)} record(s) skipped')
+
+        if path == '-':
+            result = importer.import_stream(sys.stdin, user, file_format, options['batch_size'], defaults, progress)
+        else:
+            with open(path, encoding='utf-8-sig', newline='') as stream:
+                result = importer.import_stream(stream, user, file_format, options['batch_size'], defaults, progress)
+
+        for number, message in result.errors:
+            self.stderr.write(f'record {number}: {message}')
+        summary = (f'Imported {result.resumes} of {result.records} record(s), {result.rows} rows '
+                   f'in {result.seconds:.2f}s ({result.rows_per_second:.0f} rows/s)')
+        if result.errors:
+            self.stdout.write(self.style.WARNING(f'{summary}, {len(result.errors)} skipped.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{summary}.'))
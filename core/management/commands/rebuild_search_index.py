@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core import search
+from core.models import Resume
+
+
+class Command(BaseCommand):
+    help = 'Recompute the search document of every resume and refill the full-text index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Resumes loaded and written per batch (default: 500).',
+        )
+
+    def handle(self, *args, **options):
+        resume_ids = list(Resume.objects.order_by('pk').values_list('pk', flat=True))
+        count = search.rebuild(resume_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} resume(s).'))
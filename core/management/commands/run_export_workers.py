@@ -0,0 +1,86 @@
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import jobs
+from core.workers import process_pool
+
+
+class Command(BaseCommand):
+    help = 'Run a pool of worker processes that render queued PDF export jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.EXPORT_WORKERS,
+            help='Number of render processes (default: EXPORT_WORKERS).',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Seconds to wait between queue checks when idle.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when the queue is empty instead of waiting for more jobs.',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        poll_interval = options['poll_interval']
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale job(s).')
+        self.stdout.write(f'Starting {workers} export worker(s).')
+
+        pool = process_pool(workers)
+        running = {}
+        try:
+            while not self.stopping:
+                while len(running) < workers:
+                    job_id = jobs.claim_next()
+                    if job_id is None:
+                        break
+                    running[pool.submit(jobs.run_job, job_id)] = job_id
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        status = future.result()
+                    except BrokenProcessPool as exc:
+                        jobs.fail_job(job_id, f'Worker process died: {exc}')
+                        status = 'failed'
+                        broken = True
+                    except Exception as exc:
+                        jobs.fail_job(job_id, str(exc))
+                        status = 'failed'
+                    self.stdout.write(f'Job {job_id}: {status}')
+
+                if broken:
+                    # Everything still in flight died with the pool
+                    for job_id in running.values():
+                        jobs.fail_job(job_id, 'Worker process died')
+                    running.clear()
+                    pool.shutdown(wait=False)
+                    pool = process_pool(workers)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stdout.write('Waiting for running jobs to finish...')
+            pool.shutdown(wait=True)
+
+    def stop(self, signum, frame):
+        self.stopping = True
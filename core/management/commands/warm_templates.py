@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.template import engines
+
+from core.warmup import warm_templates
+
+
+class Command(BaseCommand):
+    help = 'Compile every resume template and report how long each one took.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sort', action='store_true',
+            help='List the slowest templates first.',
+        )
+
+    def handle(self, *args, **options):
+        # Start cold, the app may already have warmed the cache on startup
+        for backend in engines.all():
+            for loader in getattr(getattr(backend, 'engine', None), 'template_loaders', []):
+                if hasattr(loader, 'reset'):
+                    loader.reset()
+
+        timings = warm_templates()
+        rows = list(timings.items())
+        if options['sort']:
+            rows.sort(key=lambda row: -1 if row[1] is None else row[1], reverse=True)
+
+        for name, seconds in rows:
+            if seconds is None:
+                self.stdout.write(self.style.WARNING(f'{name:<40} missing'))
+            else:
+                self.stdout.write(f'{name:<40} {seconds * 1000:8.2f} ms')
+
+        compiled = [seconds for seconds in timings.values() if seconds is not None]
+        self.stdout.write(self.style.SUCCESS(
+            f'Compiled {len(compiled)} template(s) in {sum(compiled) * 1000:.2f} ms'))
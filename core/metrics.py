@@ -0,0 +1,254 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager, nullcontext
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# Per-request timings collected by MetricsMiddleware, sent back as a
+# Server-Timing header and totalled per process for /metrics/. Off unless
+# PERFORMANCE_METRICS is set.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Phases of the current request, None outside an instrumented request
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('sql_queries', 'sql_seconds', 'phases')
+
+    def __init__(self):
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        # (phase, label) -> seconds
+        self.phases = {}
+
+    def execute(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - started
+            self.sql_queries += 1
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = {}
+        self.durations = {}
+        self.sql = {}
+        self.response_bytes = {}
+        self.phases = {}
+
+    def observe_request(self, view, method, status, seconds, metrics):
+        with self.lock:
+            key = (view, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            buckets, total, count = self.durations.get(view, ([0] * len(DURATION_BUCKETS), 0.0, 0))
+            index = bisect_left(DURATION_BUCKETS, seconds)
+            if index < len(buckets):
+                buckets[index] += 1
+            self.durations[view] = (buckets, total + seconds, count + 1)
+            queries, sql_seconds = self.sql.get(view, (0, 0.0))
+            self.sql[view] = (queries + metrics.sql_queries, sql_seconds + metrics.sql_seconds)
+            for key, phase_seconds in metrics.phases.items():
+                total, count = self.phases.get(key, (0.0, 0))
+                self.phases[key] = (total + phase_seconds, count + 1)
+
+    def observe_bytes(self, view, size):
+        with self.lock:
+            self.response_bytes[view] = self.response_bytes.get(view, 0) + size
+
+    def exposition(self):
+        # Prometheus text format 0.0.4
+        with self.lock:
+            lines = [
+                '# HELP resume_requests_total Requests handled, by view, method and status.',
+                '# TYPE resume_requests_total counter',
+            ]
+            for (view, method, status), count in sorted(self.requests.items()):
+                lines.append(f'resume_requests_total{{view="{view}",method="{method}",status="{status}"}} {count}')
+
+            lines += [
+                '# HELP resume_request_duration_seconds Time spent in the middleware stack and view.',
+                '# TYPE resume_request_duration_seconds histogram',
+            ]
+            for view, (buckets, total, count) in sorted(self.durations.items()):
+                cumulative = 0
+                for bound, observed in zip(DURATION_BUCKETS, buckets):
+                    cumulative += observed
+                    lines.append(f'resume_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+                lines.append(f'resume_request_duration_seconds_bucket{{view="{view}",le="+Inf"}} {count}')
+                lines.append(f'resume_request_duration_seconds_sum{{view="{view}"}} {total:.6f}')
+                lines.append(f'resume_request_duration_seconds_count{{view="{view}"}} {count}')
+
+            lines += [
+                '# HELP resume_sql_queries_total SQL queries run, by view.',
+                '# TYPE resume_sql_queries_total counter',
+            ]
+            lines += [f'resume_sql_queries_total{{view="{view}"}} {queries}'
+                      for view, (queries, _) in sorted(self.sql.items())]
+            lines += [
+                '# HELP resume_sql_seconds_total Time spent in SQL queries, by view.',
+                '# TYPE resume_sql_seconds_total counter',
+            ]
+            lines += [f'resume_sql_seconds_total{{view="{view}"}} {seconds:.6f}'
+                      for view, (_, seconds) in sorted(self.sql.items())]
+
+            lines += [
+                '# HELP resume_response_bytes_total Response body bytes sent, by view.',
+                '# TYPE resume_response_bytes_total counter',
+            ]
+            lines += [f'resume_response_bytes_total{{view="{view}"}} {size}'
+                      for view, size in sorted(self.response_bytes.items())]
+
+            lines += [
+                '# HELP resume_phase_seconds Template rendering and PDF layout/write time.',
+                '# TYPE resume_phase_seconds summary',
+            ]
+            for (phase, label), (total, count) in sorted(self.phases.items()):
+                labels = f'phase="{phase}",template="{label}"'
+                lines.append(f'resume_phase_seconds_sum{{{labels}}} {total:.6f}')
+                lines.append(f'resume_phase_seconds_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+@contextmanager
+def _timed(metrics, phase, label):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        key = (phase, label)
+        metrics.phases[key] = metrics.phases.get(key, 0.0) + time.perf_counter() - started
+
+
+def timer(phase, label=''):
+    # `with metrics.timer('template', 'modern'):` adds to the current
+    # request's phases, a no-op when nothing is being measured
+    metrics = _current.get()
+    if metrics is None:
+        return nullcontext()
+    return _timed(metrics, phase, label)
+
+
+@contextmanager
+def collected():
+    # Phases timed outside a request, e.g. in a render worker process, to be
+    # handed back with the result and added with add_phases()
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics.phases
+    finally:
+        _current.reset(token)
+
+
+def add_phases(phases):
+    metrics = _current.get()
+    if metrics is None:
+        return
+    for key, seconds in phases.items():
+        metrics.phases[key] = metrics.phases.get(key, 0.0) + seconds
+
+
+def server_timing(metrics, total):
+    entries = [f'total;dur={total * 1000:.1f}',
+               f'db;dur={metrics.sql_seconds * 1000:.1f};desc="{metrics.sql_queries} queries"']
+    for (phase, label), seconds in metrics.phases.items():
+        desc = f';desc="{label}"' if label else ''
+        entries.append(f'{phase};dur={seconds * 1000:.1f}{desc}')
+    return ', '.join(entries)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_METRICS:
+            # Dropped from the stack, requests pay nothing
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with self.wrapped(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.observe(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        # The ORM of async views runs in the request's thread sensitive
+        # sync_to_async thread, the hooks go on that thread's connections
+        stack = await sync_to_async(self.wrapped)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        return self.observe(request, response, metrics, time.perf_counter() - started)
+
+    def wrapped(self, metrics):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics.execute))
+        return stack
+
+    def observe(self, request, response, metrics, elapsed):
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        registry.observe_request(view, request.method, response.status_code, elapsed, metrics)
+        response['Server-Timing'] = server_timing(metrics, elapsed)
+        if not response.streaming:
+            registry.observe_bytes(view, len(response.content))
+        elif response.has_header('Content-Length'):
+            registry.observe_bytes(view, int(response['Content-Length']))
+        elif response.is_async:
+            response.streaming_content = self.acounted(response.streaming_content, view)
+        else:
+            response.streaming_content = self.counted(response.streaming_content, view)
+        return response
+
+    def counted(self, content, view):
+        size = 0
+        try:
+            for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            registry.observe_bytes(view, size)
+
+    async def acounted(self, content, view):
+        size = 0
+        try:
+            async for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            registry.observe_bytes(view, size)
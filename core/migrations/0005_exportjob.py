@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_research_publication_award'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='resume',
+            name='template_name',
+            field=models.CharField(choices=[('modern', 'Modern'), ('classic', 'Classic'), ('creative', 'Creative'), ('elegant', 'Elegant Serif'), ('executive', 'Executive Pro'), ('minimalist', 'Minimalist Clean'), ('timeline', 'Vertical Timeline'), ('tech', 'Tech Modern'), ('academic', 'Academic Professional'), ('designer', 'Designer Bold'), ('compact', 'Compact Single Page'), ('newyork', 'New York (Modern Blue)'), ('london', 'London (Royal)'), ('paris', 'Paris (Chic)'), ('tokyo', 'Tokyo (Clean)'), ('sidney', 'Sidney (Ocean)'), ('dubai', 'Dubai (Gold)'), ('singapore', 'Singapore (Efficient)'), ('hongkong', 'Hong Kong (Dynamic)'), ('losangeles', 'Los Angeles (Creative)'), ('toronto', 'Toronto (Structure)'), ('berlin', 'Berlin (Industrial)'), ('rome', 'Rome (Classic)'), ('madrid', 'Madrid (Warm)'), ('lisbon', 'Lisbon (Sunny)'), ('vienna', 'Vienna (Elegant)'), ('prague', 'Prague (Historic)'), ('budapest', 'Budapest (Bold)'), ('warsaw', 'Warsaw (Sturdy)'), ('oslo', 'Oslo (Minimal)'), ('stockholm', 'Stockholm (Clean)'), ('chicago', 'Chicago (Bold)'), ('miami', 'Miami (Vibrant)'), ('seattle', 'Seattle (Green)'), ('austin', 'Austin (Fresh)'), ('denver', 'Denver (Nature)'), ('boston', 'Boston (Academic)'), ('atlanta', 'Atlanta (Peach)'), ('houston', 'Houston (Space)'), ('phoenix', 'Phoenix (Desert)'), ('lasvegas', 'Las Vegas (Night)')], default='modern', max_length=50),
+        ),
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('template_name', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=10)),
+                ('cache_key', models.CharField(blank=True, max_length=64)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='core.resume')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
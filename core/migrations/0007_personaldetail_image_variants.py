@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_resume_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='personaldetail',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_personaldetail_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
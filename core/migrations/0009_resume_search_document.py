@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        # Rows are written by core.search, no triggers: SQLite rebuilds
+        # core_resume on some schema changes and would drop them
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE core_resume_search USING fts5(document, tokenize='unicode61 remove_diacritics 2')")
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX resume_search_document_idx ON core_resume "
+            "USING gin (to_tsvector('english', search_document))")
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS core_resume_search')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS resume_search_document_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_resume_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
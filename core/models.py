@@ -1,6 +1,23 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.db import models
 from django.contrib.auth.models import User
 
+from . import images
+
+# Child relations of a Resume, in the order templates and exports show them
+RESUME_SECTIONS = ['education', 'experience', 'skills', 'research', 'publications', 'awards']
+
+class ResumeQuerySet(models.QuerySet):
+    def with_content(self):
+        # Everything a template or export reads: one query for the resume,
+        # its owner and personal details, plus one per child relation
+        return self.select_related('user', 'personal_detail').prefetch_related(*[
+            models.Prefetch(section, queryset=self.model._meta.get_field(section).related_model.objects.order_by('pk'))
+            for section in RESUME_SECTIONS
+        ])
+
 class Resume(models.Model):
     TEMPLATE_CHOICES = [
         ('modern', 'Modern'),
@@ -58,13 +75,74 @@ class Resume(models.Model):
     template_name = models.CharField(max_length=50, choices=TEMPLATE_CHOICES, default='modern')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Goes up on every save, rendered template fragments are cached under it
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Plain text of the searchable content, kept current by core.search
+    search_document = models.TextField(blank=True, default='', editable=False)
+
+    objects = ResumeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Dashboard listing: a user's documents, newest first
+            models.Index(fields=['user', '-created_at'], name='resume_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title} ({self.get_doc_type_display()})"
 
-class PersonalDetail(models.Model):
+    def save(self, *args, **kwargs):
+        bump = not self._state.adding
+        if bump:
+            # Incremented in the database so concurrent saves never share a version
+            self.version = models.F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        if bump:
+            self.refresh_from_db(fields=['version'])
+
+# Resumes whose version the running code bumps itself, see versioned_edit()
+_bumped_by_caller = ContextVar('bumped_by_caller', default=frozenset())
+
+@contextmanager
+def versioned_edit(resume_id):
+    # For views that already bump the version once for a whole edit: the
+    # rows they save meanwhile do not bump it again
+    token = _bumped_by_caller.set(_bumped_by_caller.get() | {resume_id})
+    try:
+        yield
+    finally:
+        _bumped_by_caller.reset(token)
+
+def bump_version(resume_id):
+    # Moves the resume off its cached fragments (core.fragments) after a
+    # write to something they show
+    if resume_id is not None and resume_id not in _bumped_by_caller.get():
+        Resume.objects.filter(pk=resume_id).update(version=models.F('version') + 1)
+
+class ResumeContent(models.Model):
+    # Base of the rows a resume is rendered from, saving or deleting one
+    # bumps Resume.version. Queryset updates and bulk writes do not, their
+    # callers bump it.
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        bump_version(self.resume_id)
+
+    def delete(self, *args, **kwargs):
+        resume_id = self.resume_id
+        result = super().delete(*args, **kwargs)
+        bump_version(resume_id)
+        return result
+
+class PersonalDetail(ResumeContent):
     resume = models.OneToOneField(Resume, on_delete=models.CASCADE, related_name='personal_detail')
     image=models.ImageField(upload_to='profile_pics', blank=True)
+    # Resized copies of image, see core.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     full_name = models.CharField(max_length=200)
     email = models.EmailField()
     phone = models.CharField(max_length=20)
@@ -76,7 +154,11 @@ class PersonalDetail(models.Model):
     def __str__(self):
         return self.full_name
 
-class Education(models.Model):
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        images.refresh_variants(self)
+
+class Education(ResumeContent):
     resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='education')
     institution = models.CharField(max_length=200)
     degree = models.CharField(max_length=200)
@@ -88,7 +170,7 @@ class Education(models.Model):
     def __str__(self):
         return f"{self.degree} at {self.institution}"
 
-class Experience(models.Model):
+class Experience(ResumeContent):
     resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='experience')
     company = models.CharField(max_length=200)
     position = models.CharField(max_length=200)
@@ -100,7 +182,7 @@ class Experience(models.Model):
     def __str__(self):
         return f"{self.position} at {self.company}"
 
-class Skill(models.Model):
+class Skill(ResumeContent):
     resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='skills')
     name = models.CharField(max_length=100)
     proficiency = models.IntegerField(default=50, help_text="Percentage 0-100")
@@ -108,7 +190,7 @@ class Skill(models.Model):
     def __str__(self):
         return self.name
 
-class Research(models.Model):
+class Research(ResumeContent):
     resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='research')
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -120,7 +202,7 @@ class Research(models.Model):
     def __str__(self):
         return self.title
 
-class Publication(models.Model):
+class Publication(ResumeContent):
     resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='publications')
     title = models.CharField(max_length=255)
     publisher = models.CharField(max_length=255, blank=True)
@@ -130,7 +212,7 @@ class Publication(models.Model):
     def __str__(self):
         return self.title
 
-class Award(models.Model):
+class Award(ResumeContent):
     resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='awards')
     title = models.CharField(max_length=200)
     issuer = models.CharField(max_length=200)
@@ -138,3 +220,32 @@ class Award(models.Model):
 
     def __str__(self):
         return self.title
+
+class ExportJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = [STATUS_QUEUED, STATUS_RUNNING]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='export_jobs')
+    template_name = models.CharField(max_length=50)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    cache_key = models.CharField(max_length=64, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Export #{self.pk} of {self.resume_id} ({self.status})"
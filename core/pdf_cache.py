@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import re
+from importlib.metadata import PackageNotFoundError, version
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.template.loader import get_template
+from django.template.loader_tags import ExtendsNode
+
+from . import themes
+from .models import PersonalDetail, RESUME_SECTIONS
+
+# Source digests keyed by (path, mtime, size) so edited templates are picked up
+_file_digests = {}
+# Stylesheets a template file links with {% static %}, keyed the same way
+_linked_stylesheets = {}
+
+STATIC_CSS_RE = re.compile(r"""{%\s*static\s+['"]([^'"]+\.css)['"]\s*%}""")
+
+# Bookkeeping columns, they change on save or repeat content the key already covers
+_IGNORED_FIELDS = {'version', 'search_document'}
+
+
+def _storage():
+    return storages['pdf_cache']
+
+
+def _row(obj):
+    # Save timestamps change without the rendered output changing
+    return [
+        getattr(obj, field.attname) for field in obj._meta.concrete_fields
+        if not (getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False))
+        and field.name not in _IGNORED_FIELDS
+    ]
+
+
+def _file_digest(path):
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _file_digests.get(key)
+    if digest is None:
+        with open(path, 'rb') as fh:
+            digest = hashlib.sha256(fh.read()).hexdigest()
+        _file_digests[key] = digest
+    return digest
+
+
+def _stylesheets_linked_by(path):
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    stylesheets = _linked_stylesheets.get(key)
+    if stylesheets is None:
+        with open(path, encoding='utf-8') as fh:
+            names = STATIC_CSS_RE.findall(fh.read())
+        stylesheets = _linked_stylesheets[key] = [found for found in map(finders.find, names) if found]
+    return stylesheets
+
+
+def template_sources(template_name):
+    # The template file plus every layout it extends, then the static
+    # stylesheets they link
+    template = get_template(themes.template_name(template_name)).template
+    paths = []
+    while template is not None:
+        paths.append(template.origin.name)
+        parent = next((node for node in template.nodelist if isinstance(node, ExtendsNode)), None)
+        if parent is None or not isinstance(parent.parent_name.var, str):
+            break
+        template = get_template(parent.parent_name.var).template
+    yield from paths
+    for path in paths:
+        yield from _stylesheets_linked_by(path)
+
+
+def _renderer_version():
+    try:
+        return version('weasyprint')
+    except PackageNotFoundError:
+        return ''
+
+
+def cache_key(resume, template_name):
+    content = {
+        'resume': _row(resume),
+        'template': template_name,
+        'sources': [_file_digest(path) for path in template_sources(template_name)],
+        'theme': themes.THEMES.get(template_name),
+        'renderer': _renderer_version(),
+    }
+    try:
+        content['personal_detail'] = _row(resume.personal_detail)
+    except PersonalDetail.DoesNotExist:
+        content['personal_detail'] = None
+    for section in RESUME_SECTIONS:
+        content[section] = sorted((_row(obj) for obj in getattr(resume, section).all()), key=lambda row: row[0])
+    if settings.PDF_SECTIONED_CVS and resume.doc_type == 'cv':
+        # Laid out in parts (rendering.render_sectioned_pdf), each list starts a page
+        content['sectioned'] = True
+    payload = json.dumps(content, default=str, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _path(resume, key):
+    return f'{resume.pk}/{key}.pdf'
+
+
+def open_cached(resume, key):
+    storage = _storage()
+    path = _path(resume, key)
+    if not storage.exists(path):
+        return None
+    return storage.open(path, 'rb')
+
+
+def store(resume, key, content):
+    storage = _storage()
+    path = _path(resume, key)
+    if not storage.exists(path):
+        storage.save(path, ContentFile(content))
+
+
+def invalidate(resume):
+    storage = _storage()
+    directory = str(resume.pk)
+    if not storage.exists(directory):
+        return
+    _, files = storage.listdir(directory)
+    for name in files:
+        storage.delete(f'{directory}/{name}')
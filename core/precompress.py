@@ -0,0 +1,61 @@
+import os
+
+# Text formats worth compressing, woff/woff2 and images are compressed already
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.html', '.xml', '.ttf', '.otf'}
+FONT_EXTENSIONS = {'.ttf', '.otf'}
+
+
+def candidates(root, min_size):
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS and os.path.getsize(path) >= min_size:
+                yield path
+
+
+def _fresh(path, compressed):
+    # A variant that was not worth keeping leaves an empty compressed.skip
+    # behind, so unchanged files are not compressed again on every run
+    for done in (compressed, f'{compressed}.skip'):
+        if os.path.exists(done) and os.path.getmtime(done) >= os.path.getmtime(path):
+            return True
+    return False
+
+
+def _write(path, data, original_size):
+    # Only kept when it is actually smaller, the proxy falls back to the original
+    skip = f'{path}.skip'
+    if len(data) >= original_size:
+        if os.path.exists(path):
+            os.remove(path)
+        open(skip, 'wb').close()
+        return None
+    with open(f'{path}.tmp', 'wb') as fh:
+        fh.write(data)
+    os.replace(f'{path}.tmp', path)
+    if os.path.exists(skip):
+        os.remove(skip)
+    return len(data)
+
+
+def _size(path):
+    return os.path.getsize(path) if os.path.exists(path) else None
+
+
+def compress_file(path, force=False):
+    # Writes path.gz (zopfli, gzip compatible) and path.br (brotli at its
+    # highest quality) next to the file. Returns the sizes, None for a
+    # variant that was not worth keeping.
+    import brotli
+    import zopfli.gzip
+
+    original_size = os.path.getsize(path)
+    gz_path, br_path = f'{path}.gz', f'{path}.br'
+    if not force and _fresh(path, gz_path) and _fresh(path, br_path):
+        return original_size, _size(gz_path), _size(br_path)
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    mode = brotli.MODE_FONT if os.path.splitext(path)[1].lower() in FONT_EXTENSIONS else brotli.MODE_TEXT
+    gz_size = _write(gz_path, zopfli.gzip.compress(data), original_size)
+    br_size = _write(br_path, brotli.compress(data, mode=mode, quality=11), original_size)
+    return original_size, gz_size, br_size
@@ -0,0 +1,307 @@
+import asyncio
+import hashlib
+import mimetypes
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import unquote, urljoin, urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import SuspiciousFileOperation
+from django.template.loader import render_to_string
+from django.utils._os import safe_join
+
+from . import metrics, themes
+from .demo import Section
+from .workers import process_pool
+
+# Documents are resolved against this base and every URL is read from disk,
+# a render never requests anything from the site serving it
+BASE_URL = 'http://localhost/'
+
+# <style> blocks and <link rel="stylesheet"> tags, in document order
+STYLESHEET_RE = re.compile(
+    r'<style[^>]*>(.*?)</style>|<link\b[^>]*\brel=["\']stylesheet["\'][^>]*>', re.IGNORECASE | re.DOTALL)
+HREF_RE = re.compile(r'\bhref=["\']([^"\']+)["\']', re.IGNORECASE)
+
+# Per process: a FontConfiguration for each template, and the parsed <style>
+# blocks and linked stylesheets bound to it, keyed by template and a digest
+# of their text or the file's path and modification time
+_font_configs = {}
+_stylesheets = {}
+_lock = threading.Lock()
+
+# Laid out WeasyPrint documents of CV parts, keyed by template and a digest of
+# their HTML, most recently used last (see render_sectioned_pdf)
+_layouts = OrderedDict()
+
+# Worker processes for renders started from async views, one single-worker
+# pool per slot, and the renders running on each (see arender_pdf)
+_render_pools = {}
+_render_load = {}
+
+# Lists that make academic CVs long, laid out apart from the rest in
+# sectioned mode
+PDF_PART_SECTIONS = ('research', 'publications', 'awards')
+
+
+def _url_prefix(url):
+    path = urlsplit(url).path
+    return path if path.startswith('/') else f'/{path}'
+
+
+def _static_roots():
+    for entry in settings.STATICFILES_DIRS:
+        prefix, root = entry if isinstance(entry, (list, tuple)) else ('', entry)
+        yield (f'{prefix.strip("/")}/' if prefix else ''), root
+
+
+def _find_static(path):
+    # The project static directories are checked directly, then the collected
+    # files (hashed names only exist there), app static files (admin and the
+    # like) still go through the finders
+    for prefix, root in _static_roots():
+        if path.startswith(prefix):
+            candidate = safe_join(root, path[len(prefix):])
+            if os.path.isfile(candidate):
+                return candidate
+    if settings.STATIC_ROOT:
+        candidate = safe_join(settings.STATIC_ROOT, path)
+        if os.path.isfile(candidate):
+            return candidate
+    return finders.find(path)
+
+
+def local_path(url):
+    # Static and media URLs map to files on disk, the host is irrelevant
+    path = unquote(urlsplit(url).path)
+    static_prefix = _url_prefix(settings.STATIC_URL)
+    media_prefix = _url_prefix(settings.MEDIA_URL)
+    try:
+        if path.startswith(static_prefix):
+            return _find_static(path[len(static_prefix):])
+        if path.startswith(media_prefix):
+            return safe_join(settings.MEDIA_ROOT, path[len(media_prefix):])
+    except SuspiciousFileOperation:
+        pass
+    return None
+
+
+def _map_file(path):
+    with open(path, 'rb') as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return {'string': b''}
+        # WeasyPrint reads and closes file_obj, the mapping outlives fh
+        return {'file_obj': mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)}
+
+
+def url_fetcher(url):
+    if url.startswith('data:'):
+        from weasyprint import default_url_fetcher
+
+        return default_url_fetcher(url)
+    path = local_path(url)
+    if path and path.endswith('.woff2') and os.path.isfile(f'{path[:-6]}.ttf'):
+        # Browsers get a Latin subset, PDFs embed the full font next to it
+        # (WeasyPrint keeps only the glyphs a document uses)
+        path = f'{path[:-6]}.ttf'
+    if not path or not os.path.isfile(path):
+        # Nothing is fetched over the network, WeasyPrint logs and skips it
+        raise ValueError(f'{url} is not a local static or media file')
+    result = _map_file(path)
+    result.update(mime_type=mimetypes.guess_type(path)[0], redirected_url=url, filename=os.path.basename(path))
+    return result
+
+
+def _extract_stylesheets(html_string):
+    # The page without its styles, and the styles as ('string', css) or
+    # ('file', url, path). Links to anything but local files stay in the page.
+    sources = []
+
+    def extract(match):
+        if match.group(1) is not None:
+            sources.append(('string', match.group(1)))
+            return ''
+        href = HREF_RE.search(match.group(0))
+        path = href and local_path(urljoin(BASE_URL, href.group(1)))
+        if not path or not os.path.isfile(path):
+            return match.group(0)
+        sources.append(('file', urljoin(BASE_URL, href.group(1)), path))
+        return ''
+
+    return STYLESHEET_RE.sub(extract, html_string), sources
+
+
+def _stylesheets_for(template_name, sources):
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
+
+    stylesheets = []
+    with _lock:
+        font_config = _font_configs.get(template_name)
+        if font_config is None:
+            font_config = _font_configs[template_name] = FontConfiguration()
+        for source in sources:
+            if source[0] == 'string':
+                css, base_url = source[1], BASE_URL
+                key = (template_name, hashlib.sha1(css.encode()).hexdigest())
+            else:
+                _, base_url, path = source
+                stat = os.stat(path)
+                key = (template_name, path, stat.st_mtime_ns, stat.st_size)
+                css = None
+            stylesheet = _stylesheets.get(key)
+            if stylesheet is None:
+                if css is None:
+                    with open(path, encoding='utf-8') as fh:
+                        css = fh.read()
+                # Relative url()s in a linked file resolve against its own URL
+                stylesheet = _stylesheets[key] = CSS(
+                    string=css, base_url=base_url, url_fetcher=url_fetcher, font_config=font_config)
+            stylesheets.append(stylesheet)
+    return font_config, stylesheets
+
+
+def layout(html_string, template_name=None, image_cache=None):
+    # WeasyPrint pulls in native libraries, only import it when a PDF is needed
+    from weasyprint import HTML
+
+    # The inline styles and the linked static stylesheets are the same on
+    # every render of a template, they are parsed once and handed back in
+    # as stylesheets
+    html_string, sources = _extract_stylesheets(html_string)
+    font_config, stylesheets = _stylesheets_for(template_name, sources)
+    html = HTML(string=html_string, base_url=BASE_URL, url_fetcher=url_fetcher)
+    # WeasyPrint keeps decoded images for one render. Passing image_cache
+    # extends that across documents, the parts of a sectioned CV decode the
+    # photo once (see render_sectioned_pdf).
+    with metrics.timer('pdf-layout', template_name or ''):
+        return html.render(font_config=font_config, stylesheets=stylesheets, cache=image_cache)
+
+
+def html_to_pdf(html_string, template_name=None, image_cache=None):
+    # Same as HTML.write_pdf(), split so layout and writing are timed apart
+    document = layout(html_string, template_name, image_cache)
+    with metrics.timer('pdf-write', template_name or ''):
+        return document.write_pdf()
+
+
+class _ResumeWithout:
+    # The resume with some sections emptied, for rendering the rest of it.
+    # Templates skip empty sections. No pk or version, so the layout
+    # fragment cache (keyed on the whole resume) is bypassed.
+    pk = None
+    version = None
+
+    def __init__(self, resume, hidden):
+        self._resume = resume
+        self._hidden = hidden
+
+    def __getattr__(self, name):
+        if name in self._hidden:
+            return Section()
+        return getattr(self._resume, name)
+
+
+def section_parts(resume, template_name):
+    # HTML of each separately laid out part, all drawn by the chosen
+    # template: the CV without its long lists, then one part per non-empty
+    # list. Templates leave out everything but the lists when pdf_part is
+    # set, so a list part has no header, sidebar or other sections.
+    long_sections = [section for section in PDF_PART_SECTIONS if getattr(resume, section).all()]
+    parts = [(None, _ResumeWithout(resume, set(long_sections)))]
+    parts += [(section, _ResumeWithout(resume, set(long_sections) - {section})) for section in long_sections]
+    with metrics.timer('template', template_name):
+        return [
+            render_to_string(themes.template_name(template_name), themes.context(
+                template_name, {'resume': part_resume, 'pdf': True, 'pdf_part': section}))
+            for section, part_resume in parts
+        ]
+
+
+def _cached_layout(html_string, template_name, image_cache):
+    key = (template_name, hashlib.sha256(html_string.encode()).hexdigest())
+    with _lock:
+        document = _layouts.get(key)
+        if document is not None:
+            _layouts.move_to_end(key)
+            return document
+    document = layout(html_string, template_name, image_cache)
+    with _lock:
+        _layouts[key] = document
+        while len(_layouts) > settings.PDF_LAYOUT_CACHE_SIZE:
+            _layouts.popitem(last=False)
+    return document
+
+
+def render_sectioned_pdf(resume, template_name):
+    # Each part is laid out on its own and the layouts are kept, so after an
+    # edit only the changed parts go through WeasyPrint layout again. They
+    # share the template's FontConfiguration and are written as one PDF.
+    image_cache = {}
+    documents = [_cached_layout(html, template_name, image_cache) for html in section_parts(resume, template_name)]
+    pages = [page for document in documents for page in document.pages]
+    with metrics.timer('pdf-write', template_name):
+        return documents[0].copy(pages).write_pdf()
+
+
+def render_pdf(resume, template_name):
+    if settings.PDF_SECTIONED_CVS and resume.doc_type == 'cv':
+        return render_sectioned_pdf(resume, template_name)
+    with metrics.timer('template', template_name):
+        html_string = render_to_string(
+            themes.template_name(template_name), themes.context(template_name, {'resume': resume, 'pdf': True}))
+    return html_to_pdf(html_string, template_name)
+
+
+def _render_pdf_timed(resume, template_name):
+    # Runs in a worker, which has no request of its own: the template,
+    # layout and write timings go back to the parent with the PDF
+    with metrics.collected() as phases:
+        pdf = render_pdf(resume, template_name)
+    return pdf, phases
+
+
+def _slot(resume):
+    # Sectioned CVs always go to the same worker, the one holding their
+    # layouts. Anything else goes to the least busy one.
+    workers = settings.PDF_RENDER_WORKERS
+    if settings.PDF_SECTIONED_CVS and resume.doc_type == 'cv':
+        return resume.pk % workers
+    return min(range(workers), key=lambda slot: _render_load.get(slot, 0))
+
+
+def _pool(slot):
+    with _lock:
+        pool = _render_pools.get(slot)
+        if pool is None:
+            pool = _render_pools[slot] = process_pool(1, close_connections=False)
+        _render_load[slot] = _render_load.get(slot, 0) + 1
+        return pool
+
+
+async def arender_pdf(resume, template_name):
+    # Layout is CPU bound and takes seconds on long CVs. It runs in a small
+    # set of worker processes, so neither the event loop nor the GIL is held
+    # meanwhile and at most PDF_RENDER_WORKERS renders run at once. The
+    # resume goes over pickled with its prefetched rows, workers never query.
+    slot = _slot(resume)
+    pool = _pool(slot)
+    try:
+        with metrics.timer('pdf-render', template_name):
+            pdf, phases = await asyncio.wrap_future(pool.submit(_render_pdf_timed, resume, template_name))
+        metrics.add_phases(phases)
+        return pdf
+    except BrokenProcessPool:
+        # The worker died (out of memory, killed), the next render starts a new one
+        with _lock:
+            if _render_pools.get(slot) is pool:
+                del _render_pools[slot]
+        raise
+    finally:
+        with _lock:
+            _render_load[slot] -= 1
@@ -0,0 +1,162 @@
+import re
+
+from django.db import connection
+
+from .models import PersonalDetail, Resume
+
+# Full-text search over Resume.search_document. SQLite keeps a copy of each
+# document in the FTS5 table below, PostgreSQL matches an expression index
+# on to_tsvector(). Other backends fall back to a substring match.
+FTS_TABLE = 'core_resume_search'
+TS_CONFIG = 'english'
+
+_fts_available = None
+
+# Fields document_text reads, by section of the autosave endpoint
+DOCUMENT_FIELDS = {
+    'resume': {'title'},
+    'personal': {'full_name'},
+    'skills': {'name'},
+    'experience': {'position', 'company'},
+    'education': {'degree', 'institution'},
+    'research': {'title'},
+    'publications': {'title', 'publisher'},
+    'awards': {'title', 'issuer'},
+}
+
+
+def document_text(resume):
+    # What staff search by: names, skills, employers, schools and the titles
+    # of research, publications and awards. Expects with_content().
+    lines = [resume.title]
+    try:
+        lines.append(resume.personal_detail.full_name)
+    except PersonalDetail.DoesNotExist:
+        pass
+    lines += [skill.name for skill in resume.skills.all()]
+    lines += [f'{exp.position} {exp.company}' for exp in resume.experience.all()]
+    lines += [f'{edu.degree} {edu.institution}' for edu in resume.education.all()]
+    lines += [res.title for res in resume.research.all()]
+    lines += [f'{pub.title} {pub.publisher}' for pub in resume.publications.all()]
+    lines += [f'{award.title} {award.issuer}' for award in resume.awards.all()]
+    return '\n'.join(line.strip() for line in lines if line and line.strip())
+
+
+def uses_fts():
+    global _fts_available
+    if connection.vendor != 'sqlite':
+        return False
+    if _fts_available is None:
+        _fts_available = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available
+
+
+def _write_fts(rows):
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk, _ in rows])
+        cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, document) VALUES (%s, %s)', rows)
+
+
+def index_new(rows):
+    # (resume id, document) of resumes created with search_document already
+    # filled in, e.g. by core.importer
+    if uses_fts():
+        _write_fts(rows)
+
+
+def refresh(resume_id):
+    # Rebuilds the document after a save, written only when it changed
+    resume = Resume.objects.with_content().get(pk=resume_id)
+    document = document_text(resume)
+    if document == resume.search_document:
+        return False
+    # update() leaves updated_at alone, it is the autosave concurrency token
+    Resume.objects.filter(pk=resume_id).update(search_document=document)
+    if uses_fts():
+        _write_fts([(resume_id, document)])
+    return True
+
+
+def affects_document(section, fields):
+    return bool(DOCUMENT_FIELDS.get(section, set()) & set(fields))
+
+
+def delete_document(sender, instance, **kwargs):
+    # post_delete receiver of Resume, so a deleted resume no longer takes a
+    # place in search results
+    if uses_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [instance.pk])
+
+
+def rebuild(resume_ids, batch_size=500):
+    # Recomputes every given document, filling the FTS table from scratch
+    # when all of them are rebuilt
+    count = 0
+    for start in range(0, len(resume_ids), batch_size):
+        batch = list(Resume.objects.with_content().filter(pk__in=resume_ids[start:start + batch_size]))
+        changed = []
+        for resume in batch:
+            document = document_text(resume)
+            if document != resume.search_document:
+                resume.search_document = document
+                changed.append(resume)
+        if changed:
+            Resume.objects.bulk_update(changed, ['search_document'])
+        if uses_fts():
+            _write_fts([(resume.pk, resume.search_document) for resume in batch])
+        count += len(batch)
+    if uses_fts():
+        with connection.cursor() as cursor:
+            # Documents of deleted resumes
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid NOT IN (SELECT id FROM core_resume)')
+    return count
+
+
+def fts_query(text):
+    # User input as FTS5 syntax: every word must match, as a prefix
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _ranked_ids(text, limit, offset):
+    if uses_fts():
+        query = fts_query(text)
+        if not query:
+            return []
+        sql = (f'SELECT rowid, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} '
+               f'WHERE {FTS_TABLE} MATCH %s ORDER BY score, rowid LIMIT %s OFFSET %s')
+        params = [query, limit, offset]
+    elif connection.vendor == 'postgresql':
+        # Written like the index expression in migration 0010 so it is used
+        sql = (f"SELECT id, ts_rank(to_tsvector('{TS_CONFIG}', search_document), query) AS score "
+               f"FROM core_resume, websearch_to_tsquery('{TS_CONFIG}', %s) query "
+               f"WHERE to_tsvector('{TS_CONFIG}', search_document) @@ query "
+               f'ORDER BY score DESC, id LIMIT %s OFFSET %s')
+        params = [text, limit, offset]
+    else:
+        ids = (Resume.objects.filter(search_document__icontains=text)
+               .order_by('-updated_at', 'pk').values_list('pk', flat=True)[offset:offset + limit])
+        return [(pk, None) for pk in ids]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def search(text, page=1, page_size=20):
+    # (resumes in rank order, each with .score, has_next)
+    ranked = _ranked_ids(text, page_size + 1, (page - 1) * page_size)
+    has_next = len(ranked) > page_size
+    ranked = ranked[:page_size]
+    resumes = (Resume.objects.filter(pk__in=[pk for pk, _ in ranked])
+               .select_related('user', 'personal_detail')
+               .only('title', 'doc_type', 'updated_at', 'user__username', 'personal_detail__full_name')
+               .in_bulk())
+    results = []
+    for pk, score in ranked:
+        # An FTS row can outlive its resume until the next rebuild
+        if pk in resumes:
+            resume = resumes[pk]
+            resume.score = score
+            results.append(resume)
+    return results, has_next
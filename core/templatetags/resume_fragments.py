@@ -0,0 +1,37 @@
+from django import template
+
+from .. import fragments
+
+register = template.Library()
+
+
+class ResumeFragmentNode(template.Node):
+    def __init__(self, nodelist, name, resume):
+        self.nodelist = nodelist
+        self.name = name
+        self.resume = resume
+
+    def render(self, context):
+        resume = self.resume.resolve(context)
+        if getattr(resume, 'pk', None) is None or getattr(resume, 'version', None) is None:
+            # Unsaved or mock resumes (the template demo) are always rendered
+            return self.nodelist.render(context)
+        key = fragments.cache_key(self.name.resolve(context), resume, bool(context.get('pdf')))
+        value = fragments.get(key)
+        if value is None:
+            value = self.nodelist.render(context)
+            fragments.set(key, value)
+        return value
+
+
+@register.tag
+def resume_fragment(parser, token):
+    # {% resume_fragment 'experience' resume %} ... {% endresume_fragment %}
+    # Sections sharing a name must render the same markup in every layout,
+    # that is what lets switching templates reuse them.
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(f'{bits[0]} takes a section name and a resume')
+    nodelist = parser.parse(('endresume_fragment',))
+    parser.delete_first_token()
+    return ResumeFragmentNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]))
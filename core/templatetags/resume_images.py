@@ -0,0 +1,27 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from .. import images
+
+register = template.Library()
+
+
+def _srcset(detail, width, fmt):
+    return f'{images.variant_url(detail, width, fmt)} 1x, {images.variant_url(detail, width * 2, fmt)} 2x'
+
+
+@register.simple_tag(takes_context=True)
+def profile_image(context, detail, width, **attrs):
+    # width is the CSS width the template shows the photo at
+    if not getattr(detail, 'image', None):
+        return ''
+    if context.get('pdf') or not getattr(detail, 'image_variants', None):
+        # WeasyPrint has no <picture>, it gets one JPEG sharp enough for print
+        return format_html('<img src="{}"{}>', images.variant_url(detail, width * 2), flatatt(attrs))
+    return format_html(
+        '<picture style="display: contents"><source type="image/webp" srcset="{}">'
+        '<img src="{}" srcset="{}"{}></picture>',
+        _srcset(detail, width, 'webp'), images.variant_url(detail, width),
+        _srcset(detail, width, 'jpeg'), flatatt(attrs),
+    )
@@ -0,0 +1,157 @@
+from collections import namedtuple
+
+# The designs drawn by one of the shared layouts. A theme only sets the CSS
+# variables the layout's stylesheet uses, plus a few rules of its own, so
+# adding one needs no template file. Labels live in Resume.TEMPLATE_CHOICES.
+
+SIDEBAR_LEFT = 'layouts/base_cv.html'
+CLASSIC = 'layouts/classic_layout.html'
+SIDEBAR_RIGHT = 'layouts/sidebar_right_layout.html'
+
+
+class Theme(namedtuple('Theme', ['layout', 'palette', 'fonts', 'css'], defaults=[{}, ''])):
+    def stylesheet(self):
+        # Injected after the layout's stylesheets, as the template blocks were
+        variables = [f'--{name}: {value};' for name, value in self.palette.items()]
+        variables += [f'--font-{role}: {family};' for role, family in self.fonts.items()]
+        return f':root {{ {" ".join(variables)} }} {self.css}'.strip()
+
+
+THEMES = {
+    # Sidebar left
+    'newyork': Theme(
+        SIDEBAR_LEFT,
+        {'primary': '#2c3e50', 'secondary': '#34495e', 'accent': '#3498db', 'bg-sidebar': '#f8f9fa', 'text-sidebar': '#333'}),
+    'london': Theme(
+        SIDEBAR_LEFT,
+        {'primary': '#1a1a1a', 'secondary': '#4a4a4a', 'accent': '#c0392b', 'bg-sidebar': '#2c3e50', 'text-sidebar': '#ecf0f1'},
+        css='.profile-img { border-radius: 0; }'),
+    'paris': Theme(
+        SIDEBAR_LEFT,
+        {'primary': '#4a4a4a', 'secondary': '#666', 'accent': '#e67e22', 'bg-sidebar': '#fff0e6'},
+        fonts={'headings': "'Georgia', serif"},
+        css='h1 { font-style: italic; }'),
+    'tokyo': Theme(
+        SIDEBAR_LEFT,
+        {'primary': '#000', 'secondary': '#555', 'accent': '#e74c3c', 'bg-sidebar': '#fff', 'text-sidebar': '#333'},
+        css='.sidebar { border-right: 1px solid #ddd; } .profile-img { border: none; }'),
+    'sidney': Theme(
+        SIDEBAR_LEFT,
+        {'primary': '#0d47a1', 'secondary': '#1976d2', 'accent': '#00bcd4', 'bg-sidebar': '#e0f7fa', 'text-sidebar': '#01579b'},
+        css='.item-title { color: #0277bd; }'),
+    'dubai': Theme(
+        SIDEBAR_LEFT,
+        {'primary': '#b7950b', 'secondary': '#9a7d0a', 'accent': '#f1c40f', 'bg-sidebar': '#282c34', 'text-sidebar': '#f1c40f'},
+        css='.resume-container { border: 2px solid #b7950b; }'),
+    'singapore': Theme(
+        SIDEBAR_LEFT,
+        {'primary': '#2c3e50', 'secondary': '#7f8c8d', 'accent': '#16a085', 'bg-sidebar': '#f2f2f2'},
+        css='h2 { border-bottom: none; border-left: 4px solid var(--accent); padding-left: 10px; }'),
+    'hongkong': Theme(
+        SIDEBAR_LEFT,
+        {'primary': '#c0392b', 'secondary': '#e74c3c', 'accent': '#2c3e50', 'bg-sidebar': '#fff', 'text-sidebar': '#333'},
+        css='.sidebar { background: linear-gradient(to bottom, #fff 0%, #f9f9f9 100%); }'),
+    'losangeles': Theme(
+        SIDEBAR_LEFT,
+        {'primary': '#8e44ad', 'secondary': '#9b59b6', 'accent': '#f39c12', 'bg-sidebar': '#2c3e50', 'text-sidebar': '#fff'},
+        css='h1 { letter-spacing: 2px; }'),
+    'toronto': Theme(
+        SIDEBAR_LEFT,
+        {'primary': '#2c3e50', 'secondary': '#34495e', 'accent': '#3498db', 'bg-sidebar': '#dfe6e9'},
+        fonts={'main': "'Verdana', sans-serif"}),
+
+    # Classic (header on top)
+    'berlin': Theme(
+        CLASSIC,
+        {'primary': '#000', 'secondary': '#333', 'accent': '#7f8c8d'},
+        css='h1, h2 { text-transform: uppercase; letter-spacing: 3px; }'),
+    'rome': Theme(
+        CLASSIC,
+        {'primary': '#5d4037', 'secondary': '#795548', 'accent': '#d7ccc8'},
+        fonts={'headings': "'Times New Roman', serif", 'main': "'Georgia', serif"},
+        css='h1 { font-style: italic; }'),
+    'madrid': Theme(
+        CLASSIC,
+        {'primary': '#d35400', 'secondary': '#e67e22', 'accent': '#f1c40f'},
+        css='.resume-container { background: #fffbf0; }'),
+    'lisbon': Theme(
+        CLASSIC,
+        {'primary': '#16a085', 'secondary': '#27ae60', 'accent': '#f39c12'},
+        css='h2 { border-bottom: 2px dashed var(--accent); text-align: left; }'),
+    'vienna': Theme(
+        CLASSIC,
+        {'primary': '#2c3e50', 'secondary': '#34495e', 'accent': '#c0392b'},
+        fonts={'headings': "'Playfair Display', serif"},
+        css="h1 { font-family: 'Playfair Display', serif; font-size: 36px; }"),
+    'prague': Theme(
+        CLASSIC,
+        {'primary': '#4a235a', 'secondary': '#7fb3d5', 'accent': '#8e44ad'},
+        css='.sidebar { border-bottom: 4px solid var(--primary); }'),
+    'budapest': Theme(
+        CLASSIC,
+        {'primary': '#212f3d', 'secondary': '#17202a', 'accent': '#e74c3c'},
+        css='.item-title { font-weight: 900; }'),
+    'warsaw': Theme(
+        CLASSIC,
+        {'primary': '#1c2833', 'secondary': '#273746', 'accent': '#566573'},
+        fonts={'main': "'Courier New', monospace"}),
+    'oslo': Theme(
+        CLASSIC,
+        {'primary': '#2c3e50', 'secondary': '#95a5a6', 'accent': '#3498db'},
+        css='.resume-container { padding: 40px; } h2 { font-weight: 300; }'),
+    'stockholm': Theme(
+        CLASSIC,
+        {'primary': '#27ae60', 'secondary': '#2ecc71', 'accent': '#2c3e50'},
+        css='.skill-tag { background: white; color: var(--primary); border: 1px solid var(--primary); }'),
+
+    # Sidebar right
+    'chicago': Theme(
+        SIDEBAR_RIGHT,
+        {'primary': '#000', 'secondary': '#333', 'accent': '#c0392b', 'bg-sidebar': '#212529', 'text-sidebar': '#f8f9fa'},
+        css='.sidebar a { color: #e74c3c; }'),
+    'miami': Theme(
+        SIDEBAR_RIGHT,
+        {'primary': '#8e44ad', 'secondary': '#9b59b6', 'accent': '#1abc9c', 'bg-sidebar': '#fce4ec', 'text-sidebar': '#880e4f'},
+        css='h2 { color: #d81b60; }'),
+    'seattle': Theme(
+        SIDEBAR_RIGHT,
+        {'primary': '#145a32', 'secondary': '#117864', 'accent': '#a9dfbf', 'bg-sidebar': '#e8f5e9', 'text-sidebar': '#1b4f72'}),
+    'austin': Theme(
+        SIDEBAR_RIGHT,
+        {'primary': '#d35400', 'secondary': '#e67e22', 'accent': '#f39c12', 'bg-sidebar': '#fff8e1'},
+        fonts={'headings': "'Verdana'"}),
+    'denver': Theme(
+        SIDEBAR_RIGHT,
+        {'primary': '#2c3e50', 'secondary': '#34495e', 'accent': '#27ae60', 'bg-sidebar': '#d0ece7'},
+        css='.profile-img { border-radius: 10px; }'),
+    'boston': Theme(
+        SIDEBAR_RIGHT,
+        {'primary': '#566573', 'secondary': '#808b96', 'accent': '#abebc6', 'bg-sidebar': '#f0f3f4'},
+        css='h1 { border-bottom: 2px solid #566573; display: inline-block; }'),
+    'atlanta': Theme(
+        SIDEBAR_RIGHT,
+        {'primary': '#c2185b', 'secondary': '#d81b60', 'accent': '#f8bbd0', 'bg-sidebar': '#fff0f5'},
+        css='.skill-tag { background: #c2185b; }'),
+    'houston': Theme(
+        SIDEBAR_RIGHT,
+        {'primary': '#154360', 'secondary': '#1a5276', 'accent': '#2980b9', 'bg-sidebar': '#ebf5fb'},
+        css='.resume-container { border-top: 10px solid var(--primary); }'),
+    'phoenix': Theme(
+        SIDEBAR_RIGHT,
+        {'primary': '#e65100', 'secondary': '#ef6c00', 'accent': '#ffcc80', 'bg-sidebar': '#fff3e0'},
+        css='.sidebar { border-left: 2px solid #ffcc80; }'),
+    'lasvegas': Theme(
+        SIDEBAR_RIGHT,
+        {'primary': '#000', 'secondary': '#ffd700', 'accent': '#ffeb3b', 'bg-sidebar': '#1a1a1a', 'text-sidebar': '#ffd700'},
+        css='h1 { color: #000; text-shadow: 1px 1px 2px #gold; } .sidebar a { color: yellow; }'),
+}
+
+
+def template_name(code):
+    # The template file that renders a design
+    theme = THEMES.get(code)
+    return theme.layout if theme else f'{code}.html'
+
+
+def context(code, context):
+    return {**context, 'theme': THEMES.get(code)}
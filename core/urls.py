@@ -8,9 +8,18 @@ urlpatterns = [
     path('create/', views.create_resume, name='create_resume'),
     path('resume/<int:pk>/', views.view_resume, name='view_resume'),
     path('resume/<int:pk>/edit/', views.edit_resume, name='edit_resume'),
+    path('resume/<int:pk>/sections/<str:section>/', views.patch_resume_section, name='patch_resume_section'),
+    path('resume/<int:pk>/sections/<str:section>/<int:row_id>/', views.patch_resume_section, name='patch_resume_row'),
     path('resume/<int:pk>/export/', views.export_resume, name='export_resume'),
+    path('resume/<int:pk>/export/jobs/', views.enqueue_export, name='enqueue_export'),
+    path('export/jobs/<int:job_id>/', views.export_job_status, name='export_job_status'),
+    path('export/jobs/<int:job_id>/download/', views.export_job_download, name='export_job_download'),
+    path('export/bulk/', views.bulk_export_resumes, name='bulk_export'),
+    path('import/', views.import_resumes, name='import_resumes'),
+    path('search/', views.search_resumes, name='search_resumes'),
     path('templates/', views.template_gallery, name='template_gallery'),
     path('templates/demo/<str:template_name>/', views.demo_template_view, name='demo_template'),
+    path('metrics/', views.metrics_endpoint, name='metrics'),
     # Auth Views
     path('login/', auth_views.LoginView.as_view(template_name='login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='/'), name='logout'),
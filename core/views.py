@@ -1,15 +1,34 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import io
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
 from django.contrib.auth import login
-from django.http import HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import F, Q
+from django.forms import modelform_factory
+from django.http import Http404, HttpResponse, FileResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
 from django.views.decorators.clickjacking import xframe_options_sameorigin
-from .models import Resume, PersonalDetail
+from django.views.decorators.http import require_http_methods, require_POST
+from django.urls import reverse
+from . import bulk_export, demo, exporters, gallery, importer, jobs, metrics, pdf_cache, search, themes
+from .models import Resume, PersonalDetail, ExportJob, versioned_edit
+from .rendering import arender_pdf
 from .forms import (
     ResumeForm, PersonalDetailForm, 
     EducationFormSet, ExperienceFormSet, SkillFormSet,
-    ResearchFormSet, PublicationFormSet, AwardFormSet
+    ResearchFormSet, PublicationFormSet, AwardFormSet, SECTION_FORMS
 )
 
 def home(request):
@@ -26,10 +45,63 @@ def register(request):
         form = UserCreationForm()
     return render(request, 'register.html', {'form': form})
 
+def _encode_cursor(resume):
+    value = f'{resume.created_at.isoformat()}|{resume.pk}'
+    return urlsafe_b64encode(value.encode()).decode()
+
+def _decode_cursor(cursor):
+    # Bad or tampered cursors just start from the first page
+    try:
+        created_at, pk = urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeError):
+        return None
+
+async def _request_user(request):
+    # request.user would look the user up a second time when a template
+    # first touches it
+    request.user = await request.auser()
+    return request.user
+
 @login_required
-def dashboard(request):
-    resumes = Resume.objects.filter(user=request.user).order_by('-created_at')
-    return render(request, 'dashboard.html', {'resumes': resumes})
+async def dashboard(request):
+    user = await _request_user(request)
+    # Keyset pagination on (created_at, pk), served by the (user, -created_at) index
+    resumes = (Resume.objects.filter(user=user)
+               .only('title', 'doc_type', 'template_name', 'created_at')
+               .order_by('-created_at', '-pk'))
+    cursor = _decode_cursor(request.GET.get('cursor', ''))
+    if cursor:
+        created_at, pk = cursor
+        resumes = resumes.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    page_size = settings.DASHBOARD_PAGE_SIZE
+    page = [resume async for resume in resumes[:page_size + 1]]
+    next_cursor = _encode_cursor(page[page_size - 1]) if len(page) > page_size else None
+    page = page[:page_size]
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'results': [{
+                'id': resume.pk,
+                'title': resume.title,
+                'doc_type': resume.doc_type,
+                'doc_type_display': resume.get_doc_type_display(),
+                'template_name': resume.template_name,
+                'template_display': resume.get_template_name_display(),
+                'created_at': resume.created_at.isoformat(),
+                'view_url': reverse('view_resume', args=[resume.pk]),
+                'edit_url': reverse('edit_resume', args=[resume.pk]),
+            } for resume in page],
+            'next_cursor': next_cursor,
+        })
+
+    return await sync_to_async(render)(request, 'dashboard.html', {
+        'resumes': page,
+        'next_cursor': next_cursor,
+        'is_first_page': cursor is None,
+        'async_pdf_exports': settings.EXPORT_ASYNC_PDF,
+    })
 
 @login_required
 def create_resume(request):
@@ -47,11 +119,6 @@ def create_resume(request):
             # Ensure doc_type is set correctly
             if not resume.doc_type:
                 resume.doc_type = doc_type
-            resume.save()
-            
-            personal_detail = personal_form.save(commit=False)
-            personal_detail.resume = resume
-            personal_detail.save()
 
             formsets = {
                 'education': EducationFormSet(request.POST, instance=resume),
@@ -65,9 +132,19 @@ def create_resume(request):
                     'award': AwardFormSet(request.POST, instance=resume),
                 })
 
+            # Everything is validated before anything is written
             if all(fs.is_valid() for fs in formsets.values()):
-                for fs in formsets.values():
-                    fs.save()
+                with transaction.atomic():
+                    resume.save()
+                    with versioned_edit(resume.pk):
+                        personal_detail = personal_form.save(commit=False)
+                        personal_detail.resume = resume
+                        personal_detail.save()
+                        for fs in formsets.values():
+                            fs.bulk_save()
+                    search.refresh(resume.pk)
+                # Primary keys can be reused, drop anything cached under this one
+                pdf_cache.invalidate(resume)
                 messages.success(request, f'{resume.get_doc_type_display()} created successfully!')
                 return redirect('dashboard')
     else:
@@ -97,7 +174,7 @@ def create_resume(request):
 
 @login_required
 def edit_resume(request, pk):
-    resume = get_object_or_404(Resume, pk=pk, user=request.user)
+    resume = get_object_or_404(Resume.objects.with_content(), pk=pk, user=request.user)
     doc_type = resume.doc_type
     try:
         personal_detail = resume.personal_detail
@@ -123,17 +200,22 @@ def edit_resume(request, pk):
         if (resume_form.is_valid() and personal_form.is_valid() and 
             all(fs.is_valid() for fs in formsets.values())):
             
-            resume_form.save()
-            if personal_detail:
-                personal_form.save()
-            else:
-                pd = personal_form.save(commit=False)
-                pd.resume = resume
-                pd.save()
-                
-            for fs in formsets.values():
-                fs.save()
-                
+            # One transaction, so nothing renders the new version with old sections
+            with transaction.atomic(), versioned_edit(resume.pk):
+                # Bumps the version for the whole edit
+                resume_form.save()
+                if personal_detail:
+                    personal_form.save()
+                else:
+                    pd = personal_form.save(commit=False)
+                    pd.resume = resume
+                    pd.save()
+
+                for fs in formsets.values():
+                    fs.bulk_save()
+                search.refresh(resume.pk)
+            pdf_cache.invalidate(resume)
+
             messages.success(request, f'{resume.get_doc_type_display()} updated successfully!')
             return redirect('dashboard')
     else:
@@ -161,10 +243,66 @@ def edit_resume(request, pk):
 
     return render(request, 'resume_form.html', ctx)
 
+def _section_instance(resume, section, row_id):
+    if section == 'resume':
+        return resume if row_id is None else None
+    if section == 'personal':
+        return PersonalDetail.objects.filter(resume=resume).first() if row_id is None else None
+    if row_id is None:
+        return None
+    return getattr(resume, section).filter(pk=row_id).first()
+
 @login_required
-@xframe_options_sameorigin
-def view_resume(request, pk):
+@require_http_methods(['PATCH'])
+def patch_resume_section(request, pk, section, row_id=None):
+    # Autosave: {"updated_at": ..., "fields": {...}} updates one section or
+    # row, refused with 409 if the resume changed since updated_at was read
     resume = get_object_or_404(Resume, pk=pk, user=request.user)
+    form_class = SECTION_FORMS.get(section)
+    instance = _section_instance(resume, section, row_id) if form_class else None
+    if instance is None:
+        raise Http404('No such section')
+
+    try:
+        payload = json.loads(request.body)
+        expected = parse_datetime(payload['updated_at'])
+        fields = payload['fields']
+    except (ValueError, KeyError, TypeError):
+        expected = fields = None
+    if expected is None or not isinstance(fields, dict) or not fields:
+        return JsonResponse({'error': 'Expected {"updated_at": <timestamp>, "fields": {...}}'}, status=400)
+    unknown = set(fields) - (set(form_class.base_fields) - {'image'})
+    if unknown:
+        return JsonResponse({'error': f'Unknown fields: {", ".join(sorted(unknown))}'}, status=400)
+
+    # Only the sent fields are validated and written
+    form = modelform_factory(type(instance), form=form_class, fields=list(fields))(fields, instance=instance)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    now = timezone.now()
+    values = {name: form.cleaned_data[name] for name in fields} if section == 'resume' else {}
+    with transaction.atomic():
+        claimed = Resume.objects.filter(pk=resume.pk, updated_at=expected).update(
+            updated_at=now, version=F('version') + 1, **values)
+        if not claimed:
+            current = Resume.objects.filter(pk=resume.pk).values_list('updated_at', flat=True).first()
+            return JsonResponse({'error': 'This resume was changed elsewhere, reload to continue.',
+                                 'updated_at': current and current.isoformat()}, status=409)
+        if section != 'resume':
+            with versioned_edit(resume.pk):
+                form.instance.save(update_fields=list(fields))
+        # Most autosaves touch text the search document leaves out
+        if search.affects_document(section, fields):
+            search.refresh(resume.pk)
+    pdf_cache.invalidate(resume)
+    return JsonResponse({'updated_at': now.isoformat()})
+
+@login_required
+@xframe_options_sameorigin
+async def view_resume(request, pk):
+    user = await _request_user(request)
+    resume = await aget_object_or_404(Resume.objects.with_content(), pk=pk, user=user)
     template_name = request.GET.get('template', resume.template_name)
     
     # Ensure template name is valid to prevent path traversal
@@ -172,137 +310,50 @@ def view_resume(request, pk):
     if template_name not in valid_templates:
         template_name = 'modern'
 
-    context = {'resume': resume}
-    return render(request, f'{template_name}.html', context)
+    context = themes.context(template_name, {'resume': resume})
+    with metrics.timer('template', template_name):
+        return await sync_to_async(render)(request, themes.template_name(template_name), context)
 
 def template_gallery(request):
-    templates = Resume.TEMPLATE_CHOICES
+    # Pre-rendered snapshots from `manage.py build_gallery`, when available
+    snapshots = gallery.load_manifest()
+    templates = [(code, name, snapshots.get(code, {})) for code, name in Resume.TEMPLATE_CHOICES]
     return render(request, 'template_gallery.html', {'templates': templates})
 
 @xframe_options_sameorigin
 def demo_template_view(request, template_name):
-    # Create a dummy resume structure for preview
-    class DummyObj:
-        def __init__(self, **kwargs):
-            self.__dict__.update(kwargs)
-    
     # Check if template name is valid
-    valid_templates = [t[0] for t in Resume.TEMPLATE_CHOICES]
-    if template_name not in valid_templates:
+    if template_name not in demo.TEMPLATE_NAMES:
         template_name = 'modern'
 
-    # Mock Data
-    personal = DummyObj(
-        full_name='Alex Rivera',
-        email='alex.rivera@example.com',
-        phone='+1 (555) 123-4567',
-        address='San Francisco, CA',
-        linkedin_url='linkedin.com/in/alexrivera',
-        portfolio_url='alexrivera.design',
-        summary='Innovative Creative Director with 8+ years of experience in digital branding and UI/UX design. Proven track record of leading high-performance teams to deliver award-winning campaigns. Passionate about user-centric design and storytelling.'
-    )
-    
-    experiences = [
-        DummyObj(position='Senior Product Designer', company='TechFlow Inc.', start_date='2020-03', end_date='Present', is_current=True, description='Lead design systems and manage a team of 5 designers. Increased user engagement by 40% through UI overhaul.'),
-        DummyObj(position='UX Designer', company='CreativAgency', start_date='2017-06', end_date='2020-02', is_current=False, description='Designed web and mobile interfaces for Fortune 500 clients. Conducted user research and usability testing.'),
-    ]
-    
-    education = [
-        DummyObj(degree='Master of Interaction Design', institution='Design Academy', start_date='2015', end_date='2017', is_current=False, description='Focus on Human-Computer Interaction.'),
-        DummyObj(degree='Bachelor of Fine Arts', institution='University of Arts', start_date='2011', end_date='2015', is_current=False, description='Major in Graphic Design.'),
-    ]
-    
-    skills = [
-        DummyObj(name='UI/UX Design', proficiency=95),
-        DummyObj(name='Figma & Sketch', proficiency=90),
-        DummyObj(name='HTML/CSS', proficiency=80),
-        DummyObj(name='Brand Identity', proficiency=85),
-        DummyObj(name='Team Leadership', proficiency=90),
-    ]
-
-    research = [
-        DummyObj(title='User Empathy in Digital Products', date='2019', description='Published research on how emotional design affects user retention.'),
-    ]
-    
-    publications = [
-        DummyObj(title='The Future of Minimalist UI', publisher='Design Weekly', date='2021', url='designweekly.com/minimalist'),
-    ]
-    
-    awards = [
-        DummyObj(title='Best Mobile App Design', issuer='Tech Design Awards', date='2022'),
-    ]
-
-    # Structuring like the Resume model relationship
-    class ResumeMock:
-        def __init__(self):
-            self.personal_detail = personal
-            self.experience = DummyList(experiences)
-            self.education = DummyList(education)
-            self.skills = DummyList(skills)
-            self.research = DummyList(research)
-            self.publications = DummyList(publications)
-            self.awards = DummyList(awards)
-            self.doc_type = 'cv'
-            self.get_doc_type_display = 'CV' 
-
-    class DummyList(list):
-        def all(self): return self
-
-    resume = ResumeMock()
-    return render(request, f'{template_name}.html', {'resume': resume})
+    html, digest = demo.render(template_name)
+    etag = f'"{digest}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(html)
+    # Same output for everyone, browsers and proxies may keep it
+    response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={settings.DEMO_PREVIEW_MAX_AGE}'
+    return response
+
+def _cached_pdf(resume):
+    cache_key = pdf_cache.cache_key(resume, resume.template_name)
+    return cache_key, pdf_cache.open_cached(resume, cache_key)
 
 @login_required
-def export_resume(request, pk):
-    resume = get_object_or_404(Resume, pk=pk, user=request.user)
+async def export_resume(request, pk):
+    user = await _request_user(request)
+    resume = await aget_object_or_404(Resume.objects.with_content(), pk=pk, user=user)
     export_format = request.GET.get('format', 'txt')
-    filename = f"{resume.personal_detail.full_name.replace(' ', '_')}_{resume.get_doc_type_display()}.{export_format}"
+    filename = exporters.export_filename(resume, export_format)
     
     if export_format == 'txt':
-        # Generate Plain Text
-        content = []
-        pd = resume.personal_detail
-        content.append(f"NAME: {pd.full_name}")
-        content.append(f"EMAIL: {pd.email}")
-        content.append(f"PHONE: {pd.phone}")
-        content.append(f"ADDRESS: {pd.address}")
-        if pd.linkedin_url: content.append(f"LINKEDIN: {pd.linkedin_url}")
-        if pd.portfolio_url: content.append(f"PORTFOLIO: {pd.portfolio_url}")
-        content.append(f"\nSUMMARY:\n{pd.summary}\n")
-        
-        if resume.education.exists():
-            content.append("\nEDUCATION:")
-            for edu in resume.education.all():
-                content.append(f"- {edu.degree} at {edu.institution} ({edu.start_date} - {'Present' if edu.is_current else edu.end_date})")
-                if edu.description: content.append(f"  {edu.description}")
-
-        if resume.experience.exists():
-            content.append("\nEXPERIENCE:")
-            for exp in resume.experience.all():
-                content.append(f"- {exp.position} at {exp.company} ({exp.start_date} - {'Present' if exp.is_current else exp.end_date})")
-                if exp.description: content.append(f"  {exp.description}")
-
-        if resume.skills.exists():
-            content.append("\nSKILLS:")
-            for skill in resume.skills.all():
-                content.append(f"- {skill.name} ({skill.proficiency}%)")
-        
-        # CV Sections
-        if resume.research.exists():
-            content.append("\nRESEARCH:")
-            for res in resume.research.all():
-                content.append(f"- {res.title} ({res.date}): {res.description}")
-
-        if resume.publications.exists():
-            content.append("\nPUBLICATIONS:")
-            for pub in resume.publications.all():
-                content.append(f"- {pub.title} ({pub.publisher}, {pub.date})")
-
-        if resume.awards.exists():
-            content.append("\nAWARDS:")
-            for award in resume.awards.all():
-                content.append(f"- {award.title} ({award.issuer}, {award.date})")
-
-        response = HttpResponse('\n'.join(content), content_type='text/plain')
+        # Generate Plain Text, streamed line by line
+        if isinstance(request, ASGIRequest):
+            content = exporters.aiter_resume_text(resume)
+        else:
+            content = exporters.iter_resume_text(resume)
+        response = StreamingHttpResponse(content, content_type='text/plain')
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
 
@@ -314,27 +365,147 @@ def export_resume(request, pk):
         
         # We need absolute URLs for images in Word, but local images are tricky without a full URL.
         # For now, we serve the standard template.
-        response = render(request, f'{resume.template_name}.html', {'resume': resume})
+        with metrics.timer('template', resume.template_name):
+            response = await sync_to_async(render)(
+                request, themes.template_name(resume.template_name),
+                themes.context(resume.template_name, {'resume': resume}))
         response['Content-Type'] = 'application/msword'
         return response
 
     elif export_format == 'pdf':
-        response = HttpResponse(content_type='application/pdf')
+        # Rendered PDFs are cached under a hash of everything that affects the output
+        cache_key, cached = await sync_to_async(_cached_pdf)(resume)
+        etag = f'"{cache_key}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            if cached is not None:
+                cached.close()
+            response['ETag'] = etag
+            return response
+
+        if cached is not None:
+            response = FileResponse(cached, content_type='application/pdf')
+        else:
+            pdf = await arender_pdf(resume, resume.template_name)
+            await sync_to_async(pdf_cache.store)(resume, cache_key, pdf)
+            response = HttpResponse(pdf, content_type='application/pdf')
+
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        # Render HTML
-        # We need absolute URIs for images/css to work in WeasyPrint
-        # get_template handles standard rendering
-        from django.template.loader import render_to_string
-        from weasyprint import HTML, CSS
-        
-        html_string = render_to_string(f'{resume.template_name}.html', {'resume': resume}, request=request)
-        
-        # WeasyPrint needs a base_url to find static files
-        base_url = request.build_absolute_uri('/')
-        
-        # Generate PDF
-        HTML(string=html_string, base_url=base_url).write_pdf(response)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
         return response
 
     return redirect('dashboard')
+
+def _job_payload(job):
+    payload = {
+        'id': job.pk,
+        'status': job.status,
+        'status_url': reverse('export_job_status', args=[job.pk]),
+    }
+    if job.status == ExportJob.STATUS_DONE:
+        payload['download_url'] = reverse('export_job_download', args=[job.pk])
+    elif job.status == ExportJob.STATUS_FAILED:
+        payload['error'] = job.error
+    return payload
+
+@login_required
+@require_POST
+def enqueue_export(request, pk):
+    resume = get_object_or_404(Resume.objects.with_content(), pk=pk, user=request.user)
+    try:
+        job = jobs.enqueue_pdf(request.user, resume)
+    except jobs.TooManyJobs:
+        return JsonResponse({'error': 'You already have exports in progress, try again shortly.'}, status=429)
+    except jobs.QueueFull:
+        response = JsonResponse({'error': 'The export queue is full, try again shortly.'}, status=503)
+        response['Retry-After'] = '10'
+        return response
+    return JsonResponse(_job_payload(job), status=202)
+
+@login_required
+def export_job_status(request, job_id):
+    job = get_object_or_404(ExportJob, pk=job_id, user=request.user)
+    return JsonResponse(_job_payload(job))
+
+@login_required
+def export_job_download(request, job_id):
+    job = get_object_or_404(ExportJob.objects.select_related('resume__personal_detail'), pk=job_id, user=request.user)
+    if job.status != ExportJob.STATUS_DONE:
+        return JsonResponse(_job_payload(job), status=409)
+    cached = pdf_cache.open_cached(job.resume, job.cache_key)
+    if cached is None:
+        # The document was edited since, the rendered file was dropped
+        return JsonResponse({'error': 'This export has expired, please export again.'}, status=410)
+    return FileResponse(cached, as_attachment=True, filename=exporters.export_filename(job.resume, 'pdf'), content_type='application/pdf')
+
+@staff_member_required
+def bulk_export_resumes(request):
+    # e.g. ?ids=1,2,3&user=alice&user=bob&format=pdf,txt
+    ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk.strip().isdigit()]
+    usernames = request.GET.getlist('user')
+    formats = [f for f in request.GET.get('format', 'pdf').split(',') if f in exporters.CONTENT_TYPES]
+    if not (ids or usernames) or not formats:
+        return JsonResponse({'error': 'Pass ids and/or user, and a format of txt, doc or pdf.'}, status=400)
+
+    resume_ids = list(bulk_export.select_resumes(ids, usernames))
+    total = len(resume_ids) * len(formats)
+    results = bulk_export.iter_exports(resume_ids, formats, settings.BULK_EXPORT_WORKERS, shared=True)
+    response = StreamingHttpResponse(
+        bulk_export.stream_zip(results, total, progress=bulk_export.log_progress),
+        content_type='application/zip')
+    response['Content-Disposition'] = 'attachment; filename="resumes.zip"'
+    response['X-Export-Total'] = str(total)
+    return response
+
+@login_required
+@require_POST
+def import_resumes(request):
+    # Multipart upload of a JSON Resume or CSV file as "file", imported into
+    # the signed-in user's documents, see core.importer
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': 'Upload a JSON Resume or CSV file as "file".'}, status=400)
+    file_format = request.POST.get('format') or importer.detect_format(upload.name)
+    if file_format not in ('json', 'csv'):
+        return JsonResponse({'error': 'format must be json or csv.'}, status=400)
+    defaults = {'doc_type': request.POST.get('doc_type'), 'template_name': request.POST.get('template_name')}
+    # Decoded as it is read, the upload is never held as one string
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    result = importer.import_stream(stream, request.user, file_format, settings.IMPORT_BATCH_SIZE, defaults)
+    return JsonResponse(result.as_dict(settings.IMPORT_MAX_REPORTED_ERRORS), status=201 if result.resumes else 400)
+
+@staff_member_required
+def search_resumes(request):
+    # Ranked full-text search over every resume, see core.search
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    if not query:
+        return JsonResponse({'error': 'Pass the search terms as ?q='}, status=400)
+
+    resumes, has_next = search.search(query, page, settings.SEARCH_PAGE_SIZE)
+    results = []
+    for resume in resumes:
+        try:
+            full_name = resume.personal_detail.full_name
+        except PersonalDetail.DoesNotExist:
+            full_name = ''
+        results.append({
+            'id': resume.pk,
+            'title': resume.title,
+            'doc_type': resume.doc_type,
+            'owner': resume.user.username,
+            'full_name': full_name,
+            'score': resume.score,
+            'updated_at': resume.updated_at.isoformat(),
+        })
+    return JsonResponse({'query': query, 'page': page, 'has_next': has_next, 'results': results})
+
+def metrics_endpoint(request):
+    # Prometheus scrape target, only answered for local clients
+    if not settings.PERFORMANCE_METRICS or request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(metrics.registry.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
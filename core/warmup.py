@@ -0,0 +1,33 @@
+from time import perf_counter
+
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.template.loader_tags import ExtendsNode
+
+from . import themes
+from .models import Resume
+
+
+def compile_chain(template_name):
+    # The template and every layout it extends, with the time each one took
+    while template_name:
+        start = perf_counter()
+        template = get_template(template_name).template
+        yield template_name, perf_counter() - start
+        parent = next((node for node in template.nodelist if isinstance(node, ExtendsNode)), None)
+        if parent is None or not isinstance(parent.parent_name.var, str):
+            break
+        template_name = parent.parent_name.var
+
+
+def warm_templates():
+    # Seconds spent compiling each template file, None for missing templates.
+    # Layouts are listed on their own, under the first template extending them.
+    timings = {}
+    for code, _ in Resume.TEMPLATE_CHOICES:
+        try:
+            for name, seconds in compile_chain(themes.template_name(code)):
+                timings.setdefault(name, seconds)
+        except TemplateDoesNotExist:
+            timings[themes.template_name(code)] = None
+    return timings
@@ -0,0 +1,22 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.db import connections
+
+
+def _setup_django():
+    import django
+    django.setup()
+
+
+def process_pool(max_workers, close_connections=True):
+    # Children are spawned rather than forked so they never share the
+    # parent's open database connections or threads. Pools started while
+    # serving a request leave the request's connection alone.
+    if close_connections:
+        connections.close_all()
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=get_context('spawn'),
+        initializer=_setup_django,
+    )
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from . import database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,11 +78,18 @@ WSGI_APPLICATION = 'resume_builder.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Set DATABASE_URL for PostgreSQL or another SQLite file, see database.py
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database.from_env(BASE_DIR / 'db.sqlite3'),
+}
+
+# Applied to every new SQLite connection (core.db). WAL lets exports read
+# while an edit is being written, busy_timeout makes writers wait their turn.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
 }
 
 
@@ -120,6 +131,8 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
+# Filled by `collectstatic`, then `compress_static` for the front proxy
+STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -127,6 +140,8 @@ STATICFILES_DIRS = [
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+DASHBOARD_PAGE_SIZE = 24
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'home'
@@ -134,3 +149,69 @@ LOGOUT_REDIRECT_URL = 'home'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    # Rendered PDF exports, keyed by a hash of the resume content (see core.pdf_cache).
+    # Point this at any Storage backend to share the cache between servers.
+    'pdf_cache': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {
+            'location': BASE_DIR / 'cache' / 'pdf',
+        },
+    },
+}
+
+# Background PDF exports (core.jobs). Workers are started with
+# `python manage.py run_export_workers`; turn EXPORT_ASYNC_PDF on once they run.
+EXPORT_ASYNC_PDF = False
+EXPORT_WORKERS = 2
+EXPORT_JOBS_PER_USER = 2
+EXPORT_QUEUE_MAX_PENDING = 100
+EXPORT_JOB_TIMEOUT = 600
+
+# Process pool size for bulk ZIP exports (core.bulk_export). The view's pool
+# is started once per web process and shared by its requests.
+BULK_EXPORT_WORKERS = 4
+
+# Rendered layout sections (core.fragments), keyed on Resume.version. A small
+# per-process LRU sits in front of the named cache.
+RESUME_FRAGMENT_CACHE = 'default'
+RESUME_FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+RESUME_FRAGMENT_LRU_SIZE = 256
+
+# Compile every resume template when the app loads instead of on first use
+# (core.warmup). settings_production turns this on.
+WARM_TEMPLATES_ON_STARTUP = False
+
+# Lay out long CVs in parts (the CV, then research, publications and awards
+# each starting a new page, all in the theme's markup) and keep the layouts
+# of the last PDF_LAYOUT_CACHE_SIZE parts per render process, so an edit only
+# re-lays out the parts it touched. A CV is always rendered by the same
+# worker of the async export view (core.rendering).
+PDF_SECTIONED_CVS = False
+PDF_LAYOUT_CACHE_SIZE = 12
+
+# Worker processes rendering the PDFs of the async export view, per web
+# process (core.rendering)
+PDF_RENDER_WORKERS = 2
+
+# Browser/proxy lifetime of the template gallery previews (core.demo)
+DEMO_PREVIEW_MAX_AGE = 60 * 60
+
+# Results per page of the staff resume search (core.search)
+SEARCH_PAGE_SIZE = 20
+
+# Records inserted per transaction by the JSON Resume/CSV import, and how
+# many record errors the upload endpoint sends back (core.importer)
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_REPORTED_ERRORS = 100
+
+# Per-request SQL, template and PDF timings as Server-Timing headers, totals
+# per process at /metrics/ for the addresses below (core.metrics)
+PERFORMANCE_METRICS = os.environ.get('PERFORMANCE_METRICS', '').lower() in {'1', 'true', 'yes', 'on'}
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
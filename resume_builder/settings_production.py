@@ -0,0 +1,50 @@
+"""
+Production settings for resume_builder.
+
+Run with DJANGO_SETTINGS_MODULE=resume_builder.settings_production and set
+DJANGO_SECRET_KEY and DJANGO_ALLOWED_HOSTS in the environment.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost').split(',')
+
+# Templates are compiled once per process and kept in memory. Edits to the
+# template files need a restart.
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [BASE_DIR / 'templates'],
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+# Compile every resume template while the worker boots (see core.warmup)
+WARM_TEMPLATES_ON_STARTUP = True
+
+# collectstatic writes content-hashed copies ({% static %} links to them), so
+# the proxy can serve /static/ with far-future expiry headers
+STORAGES = {
+    **STORAGES,
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage',
+    },
+}
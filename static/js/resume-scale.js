@@ -0,0 +1,30 @@
+// Mobile Scaling Script
+function scanResume() {
+    if (window.matchMedia('print').matches) return;
+
+    const container = document.querySelector('.resume-container');
+    if (!container) return;
+
+    const screenWidth = window.innerWidth;
+    const containerWidth = 794; // 210mm approx in pixels at 96dpi
+
+    if (screenWidth < containerWidth + 40) {
+        const scale = (screenWidth - 40) / containerWidth;
+        container.style.transform = `scale(${scale})`;
+        container.style.transformOrigin = 'top left';
+        // Adjust body height to account for scaling
+        const scaledHeight = container.offsetHeight * scale;
+        document.body.style.height = `${scaledHeight + 40}px`;
+        // Center if needed
+        if (screenWidth > 500) {
+             container.style.marginLeft = '20px'; // some padding
+        }
+    } else {
+        container.style.transform = 'none';
+        document.body.style.height = 'auto';
+        container.style.margin = '0 auto';
+    }
+}
+
+window.addEventListener('resize', scanResume);
+window.addEventListener('load', scanResume);